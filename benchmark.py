@@ -0,0 +1,306 @@
+import os
+import sys
+import json
+import time
+import shutil
+import atexit
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+#NOTE: headless benchmarks of the wizard UI, run 'python benchmark.py' (linux: Xvfb is started when there is no display).
+#NOTE: 'python benchmark.py --output baseline.json' to save results, then
+#      'python benchmark.py --compare baseline.json' flags the metrics that regressed, exit code 1 if any did.
+
+REPEAT = 10 #runs per timed metric
+LICENSE_SIZES = (64 * 1024, 1024 * 1024, 8 * 1024 * 1024) #bytes of license text inserted in Page1
+PAYLOAD_FILES = 64 #files of PAYLOAD_FILE_SIZE in the payload installed by Page3
+PAYLOAD_FILE_SIZE = 1024 * 1024
+THRESHOLD = 0.20 #relative slowdown flagged as a regression
+MIN_DELTA_MS = 0.5 #absolute slowdown under which ms metrics are considered noise
+
+#------------------------ DISPLAY -----------------------
+#--------------------------------------------------------
+
+def ensure_display():
+    """Start a Xvfb virtual display when running on linux without one"""
+    if (not sys.platform.startswith('linux')) or os.environ.get('DISPLAY'):
+        return None
+    xvfb = shutil.which('Xvfb')
+    if (xvfb is None):
+        print("[ERROR]: No display and Xvfb not found, install it ('apt install xvfb') or set DISPLAY")
+        sys.exit(2)
+    for number in range(99, 199):
+        if (not os.path.exists(f'/tmp/.X11-unix/X{number}')) and (not os.path.exists(f'/tmp/.X{number}-lock')):
+            break
+    process = subprocess.Popen([xvfb, f':{number}', '-screen', '0', '1280x1024x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    atexit.register(process.terminate)
+    for _ in range(100): # Wait for the server socket
+        if os.path.exists(f'/tmp/.X11-unix/X{number}'):
+            break
+        time.sleep(0.05)
+    os.environ['DISPLAY'] = f':{number}'
+    print(f"[INFO]: Started Xvfb on display :{number}")
+    return None
+
+#------------------------ HELPERS -----------------------
+#--------------------------------------------------------
+
+def summarize(samples, unit="ms", better="lower"):
+    return {
+        "unit": unit,
+        "better": better,
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "runs": len(samples),
+        }
+
+def timed_ms(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+def reset_caches(main):
+    """PhotoImages and dialogs belong to the Tk interpreter that created them, drop them between wizards"""
+    main.IMAGECACHE.clear()
+    main.PLACEHOLDERCACHE.clear()
+    main.IMAGEWAITERS.clear()
+    main.IMAGEPOLLING = False
+    main.DIALOGPOOL.clear()
+    main.USERSTORAGE.clear()
+    return None
+
+def new_wizard(main):
+    reset_caches(main)
+    app = main.Wizard()
+    while (app.first_interactive_ms is None): # The first page is built by the event loop
+        app.update()
+    return app
+
+#----------------------- BENCHMARKS ---------------------
+#--------------------------------------------------------
+
+def bench_wizard(main, results):
+    """Wizard() construction, its first frame (loading state) and its first interactive frame (first page shown)"""
+    construct, first_frame, first_interactive = [], [], []
+    for _ in range(REPEAT):
+        reset_caches(main)
+        start = time.perf_counter()
+        app = main.Wizard()
+        construct.append((time.perf_counter() - start) * 1000)
+        app.update_idletasks() # Same as main.py before closing the splash
+        first_frame.append((time.perf_counter() - start) * 1000)
+        while (app.first_interactive_ms is None):
+            app.update()
+        first_interactive.append((time.perf_counter() - start) * 1000)
+        app.destroy()
+    results["wizard_construct"] = summarize(construct)
+    results["wizard_first_frame"] = summarize(first_frame)
+    results["wizard_first_interactive"] = summarize(first_interactive)
+    return None
+
+def bench_navigation(main, results):
+    """update_page between already built pages, and a batched footer refresh"""
+    app = new_wizard(main)
+    for idx in range(len(app.pages)): # Build every page first, construction is measured on its own
+        app.get_page(idx).lower()
+    app.update_page(0)
+    app.update()
+
+    update_page, refresh = [], []
+    for _ in range(REPEAT):
+        for idx in list(range(1, len(app.pages))) + [0]:
+            update_page.append(timed_ms(lambda: (app.update_page(idx), app.update_idletasks())))
+        refresh.append(timed_ms(lambda: (app.refresh_page(), app.update_idletasks())))
+    results["update_page"] = summarize(update_page)
+    results["refresh_ui"] = summarize(refresh)
+    app.destroy()
+    return None
+
+def bench_dialogs(main, results):
+    """Open then close each dialog kind, the first open builds it, the next ones reuse it"""
+    app = new_wizard(main)
+    for kind in main.DIALOG_KINDS:
+        samples = []
+        for _ in range(REPEAT + 1):
+            def open_close():
+                dialog = main.get_dialog(app, kind)
+                app.after(1, dialog.close, True) # Runs inside the modal wait of show()
+                dialog.show("Benchmark", "Benchmark message", "320x200", (0, 0), ("OK", "OK"))
+                return None
+            samples.append(timed_ms(open_close))
+        results[f"dialog_{kind}_first"] = summarize(samples[:1])
+        results[f"dialog_{kind}"] = summarize(samples[1:])
+    app.destroy()
+    return None
+
+def bench_license(main, results, tmpdir):
+    """Page1 constructor and full license streaming at several text sizes"""
+    app = new_wizard(main)
+    line = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore.\n"
+    license_path = main.LICENSE_PATH
+    try:
+        for size in LICENSE_SIZES:
+            path = os.path.join(tmpdir, f'license_{size}.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(line * (size // len(line)))
+            main.LICENSE_PATH = path
+
+            construct, loaded = [], []
+            for _ in range(max(1, REPEAT // 2)):
+                start = time.perf_counter()
+                page = main.Page1(app.container, app.refresh_page)
+                page.wizard = app
+                construct.append((time.perf_counter() - start) * 1000)
+                while (not page.license_loaded):
+                    app.update()
+                loaded.append((time.perf_counter() - start) * 1000)
+                page.destroy()
+            results[f"license_{size // 1024}kb_construct"] = summarize(construct)
+            results[f"license_{size // 1024}kb_loaded"] = summarize(loaded)
+    finally:
+        main.LICENSE_PATH = license_path
+    app.destroy()
+    return None
+
+def bench_install(main, results, tmpdir):
+    """Event loop responsiveness while Page3 shows the progress of a real install"""
+    from payload import write_payload
+
+    src = os.path.join(tmpdir, 'payload')
+    os.makedirs(src, exist_ok=True)
+    for i in range(PAYLOAD_FILES):
+        with open(os.path.join(src, f'file_{i:03d}.bin'), 'wb') as f:
+            f.write(os.urandom(PAYLOAD_FILE_SIZE // 2) + bytes(PAYLOAD_FILE_SIZE // 2)) # Half incompressible
+    payload_path = os.path.join(tmpdir, 'payload.pwz')
+    write_payload(src, payload_path)
+
+    app = new_wizard(main)
+    locate_payload = main.locate_payload
+    main.locate_payload = lambda assets_dir: payload_path
+    try:
+        durations, tick_rates, max_gaps, p95_gaps = [], [], [], []
+        for run in range(max(1, REPEAT // 5)):
+            main.USERSTORAGE.update({"install_dir": os.path.join(tmpdir, f'install_{run}'), "int_value": 4, "enum_choice": "Complete"})
+            page = main.Page3(app.container, app.refresh_page)
+            page.wizard = app
+            gaps = []
+            last = [time.perf_counter()]
+
+            # 1 ms ticks, their gaps show how long the event loop was blocked
+            def tick():
+                now = time.perf_counter()
+                gaps.append((now - last[0]) * 1000)
+                last[0] = now
+                if (page.loadbar_loading==False):
+                    app.quit()
+                    return None
+                app.after(1, tick)
+                return None
+
+            start = time.perf_counter()
+            page.start_loadbar()
+            app.after(1, tick)
+            app.mainloop()
+            duration = time.perf_counter() - start
+            if (page.loadbar_complete==False):
+                print(f"[WARNING]: Benchmark install failed: {page.install_errors[:1]}")
+            durations.append(duration * 1000)
+            tick_rates.append(len(gaps) / duration)
+            max_gaps.append(max(gaps))
+            p95_gaps.append(statistics.quantiles(gaps, n=20)[-1] if (len(gaps) >= 2) else gaps[0])
+            page.destroy()
+        results["install_duration"] = summarize(durations)
+        results["install_loop_ticks_per_s"] = summarize(tick_rates, unit="ticks/s", better="higher")
+        results["install_loop_max_gap"] = summarize(max_gaps)
+        results["install_loop_p95_gap"] = summarize(p95_gaps)
+    finally:
+        main.locate_payload = locate_payload
+    app.destroy()
+    return None
+
+#------------------------ COMPARE -----------------------
+#--------------------------------------------------------
+
+def compare(results, baseline, threshold=THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """Print every metric against the baseline, return the names of the ones that regressed"""
+    regressions = []
+    print(f"{'metric':<32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if (base is None):
+            print(f"{name:<32} {'-':>12} {current['median']:>12.2f}      new")
+            continue
+        change = (current["median"] - base["median"]) / base["median"] if base["median"] else 0.0
+        if (current["better"]=="lower"):
+            regressed = (change > threshold) and ((current["unit"]!="ms") or (current["median"] - base["median"] > min_delta_ms))
+        else:
+            regressed = (change < -threshold)
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<32} {base['median']:>12.2f} {current['median']:>12.2f} {change:>+8.1%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+#-------------------------- MAIN ------------------------
+#--------------------------------------------------------
+
+def run_benchmarks():
+    ensure_display()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='pywiz_bench_') as tmpdir:
+        for name, bench, args in (
+                ("wizard", bench_wizard, ()),
+                ("navigation", bench_navigation, ()),
+                ("dialogs", bench_dialogs, ()),
+                ("license", bench_license, (tmpdir,)),
+                ("install", bench_install, (tmpdir,)),
+                ):
+            print(f"[INFO]: Benchmark: {name}..")
+            bench(main, results, *args)
+
+    import tkinter
+    return {
+        "meta": {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tk": tkinter.TkVersion,
+            "repeat": REPEAT,
+            },
+        "results": results,
+        }
+
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the PyWiz wizard")
+    parser.add_argument("--output", help="write the results json to this file, printed otherwise")
+    parser.add_argument("--compare", help="baseline results json, exit code 1 if a metric regressed")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="relative change flagged as a regression")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per timed metric")
+    args = parser.parse_args()
+    REPEAT = max(1, args.repeat)
+
+    report = run_benchmarks()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print(f"[INFO]: Results written to '{args.output}'")
+    else:
+        print(json.dumps(report, indent=1))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(report["results"], baseline, args.threshold)
+        if regressions:
+            print(f"[ERROR]: {len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("[SUCCESS] No regression")
@@ -3,6 +3,9 @@ import sys
 import tempfile
 import shutil
 import subprocess
+from build_utils import bake_assets, stage_assets, get_extraction_spec, get_extraction_marker, EXTRACTION_MARKER, BuildCache, BUILD_CACHE, get_code_files, get_interpreter_key, hash_values
+from build_utils import PROTECTED_MODULES, get_runtime_exclusions, collect_folder_bundle, write_bundle_report
+from payload import write_payload, PAYLOAD_FILENAME
 
 #NOTE: 'pip install nuitka' required.
 #NOTE: your antivirus might interact with the build process of the executable.
@@ -15,6 +18,13 @@ import subprocess
 PYPATH = "D:\\Softs\\Python\\Python311\\python.exe"
 HIDECONSOLE = True #hide the console (for final build)
 INSTALLER_NAME = 'GeoScatter5.6.1_installer' #name of the installer, no '.' or os illegal characters
+PRODUCT_ID = 'GeoScatter' #stable across versions, no os illegal characters, cached extractions of every version share its folder
+APPEND_PAYLOAD = True #append the payload to the executable, read in place at runtime instead of being extracted to temp with the assets
+PAYLOAD_CODEC = "zlib" #"zlib", "lzma" (smaller, slower) or "store", each payload block is compressed independently so it decompresses on every core
+PILLOW_FREE = True #drop Pillow from the bundle, every image is baked as png and loaded natively by Tk at runtime
+CLEAN_BUILD = False #rebuild everything from scratch, otherwise unchanged steps are skipped and Nuitka reuses its build directory
+AUTO_EXCLUDE = True #don't follow the packages Nuitka finds but the installer never imports at runtime, derived from an import trace
+CACHED_EXTRACTION = True #unpack the onefile once per build in the user cache dir, later launches reuse it instead of unpacking to a new temp dir
 
 #----------------------- DIR UTILS ----------------------
 #--------------------------------------------------------
@@ -32,9 +42,17 @@ ASSETSDIR = os.path.join(MAINDIR,'assets') #../ParentFolder/pywiz/assets/
 assert os.path.exists(ASSETSDIR), "[ERROR]: 'assets' directory not found? '../ParentFolder/pywiz/assets/'"
 ICOPATH = os.path.join(ASSETSDIR,'app.ico')
 
+#define payload, the application files to install
+PAYLOADDIR = os.path.join(MAINDIR,'payload') #../ParentFolder/pywiz/payload/
+PAYLOADASSET = os.path.join(ASSETSDIR,PAYLOAD_FILENAME) #../ParentFolder/pywiz/assets/payload.pwz
+
 #define result directory
 RESULTDIR = os.path.join(PROJECTDIR,'dist_nuitka')  # D:\Work\ParentFolder\dist_nuitka\
 INSTALLER = os.path.join(PROJECTDIR,f'{INSTALLER_NAME}.exe')  # Final executable in project root
+BASEINSTALLER = os.path.join(RESULTDIR,f'{INSTALLER_NAME}.base.exe') # Executable before the payload is appended, reused while its inputs don't change
+BUILDCACHEFILE = os.path.join(RESULTDIR,BUILD_CACHE) # Hashes of the inputs of the previous build
+STAGEDDIR = os.path.join(RESULTDIR,'assets') # Optimized copy of the assets, the folder that gets bundled
+STAGEDPAYLOAD = os.path.join(STAGEDDIR,PAYLOAD_FILENAME)
 
 #define fallback log file
 TMPDIR = tempfile.gettempdir()
@@ -47,14 +65,32 @@ def build_program():
     """build the program using Nuitka"""
     print("[---------------------- START -----------------------------]")
 
-    # Clean up any existing files/directories first
-    if os.path.exists(INSTALLER):
-        print(f'[INFO]: `{INSTALLER_NAME}.exe` already exists.. Removing')
-        os.remove(INSTALLER)
-
-    if os.path.exists(RESULTDIR):
-        print(f'[INFO]: Leftover `{RESULTDIR}` directory exists.. Removing')
+    # The build directory is kept between builds, it holds Nuitka's compiled files and our cache
+    if (CLEAN_BUILD==True) and os.path.exists(RESULTDIR):
+        print(f'[INFO]: Clean build, removing `{RESULTDIR}`')
         shutil.rmtree(RESULTDIR)
+    cache = BuildCache(BUILDCACHEFILE)
+
+    # Pre-resize header images and icon to their display size, main.py loads them without resampling nor Pillow.
+    # Jpeg is only a candidate when Pillow is bundled to decode it
+    print('[INFO]: Baking images..')
+    bake_assets(ASSETSDIR, allow_jpeg=(PILLOW_FREE==False))
+
+    # Pack the payload, either bundled with the assets or appended to the executable once built
+    payload_key = cache.tree_hash(PAYLOADDIR)
+    if (APPEND_PAYLOAD==False) and (payload_key is not None):
+        if cache.changed("payload_asset", payload_key) or (not cache.output_unchanged("payload_asset", PAYLOADASSET)):
+            size_mb = write_payload(PAYLOADDIR, PAYLOADASSET, codec=PAYLOAD_CODEC) / (1024 * 1024)
+            print(f'[INFO]: Payload packed in the assets ({size_mb:.1f} MB)')
+            cache.set("payload_asset", payload_key)
+            cache.set_output("payload_asset", PAYLOADASSET)
+        else:
+            print('[INFO]: Payload in the assets is up to date')
+    elif os.path.exists(PAYLOADASSET):
+        os.remove(PAYLOADASSET)
+
+    # Bundle only what the runtime reads, baked images replace their sources
+    stage_assets(ASSETSDIR, STAGEDDIR, extra_files=({EXTRACTION_MARKER: get_extraction_marker(PRODUCT_ID)} if (CACHED_EXTRACTION==True) else None))
 
     # Create output directory
     os.makedirs(RESULTDIR, exist_ok=True)
@@ -68,8 +104,21 @@ def build_program():
         
     ]
 
+    # Pillow is only imported lazily by main.py for images that were not baked
+    if (PILLOW_FREE==True):
+        print('[INFO]: Images are baked, Pillow is not bundled')
+        args.append("--nofollow-import-to=PIL")
+
+    # Don't compile what static analysis finds but the installer never imports, traced by running main.py headless
+    if (AUTO_EXCLUDE==True):
+        protected = PROTECTED_MODULES + (() if (PILLOW_FREE==True) else ("PIL",)) # Pillow is imported lazily, when it is bundled
+        trace_key = hash_values(cache.files_hash(get_code_files(MAINDIR), MAINDIR), get_interpreter_key("nuitka"), protected)
+        excluded = get_runtime_exclusions(cache, MAINDIR, trace_key, protected, excludes=(("PIL",) if (PILLOW_FREE==True) else ()))
+        print(f'[INFO]: {len(excluded)} packages never imported at runtime are not followed')
+        args.extend([f"--nofollow-import-to={module}" for module in excluded])
+
     # Add assets directory
-    args.extend([f"--include-data-dir={ASSETSDIR}=assets"])
+    args.extend([f"--include-data-dir={STAGEDDIR}=assets"])
 
     # Add icon if it exists
     if (os.path.exists(ICOPATH)):
@@ -91,41 +140,96 @@ def build_program():
     #     "--windows-product-version=5.6.1.0",
     # ])
 
+    # Unpack in a folder named after the content of the bundle, Nuitka only rewrites the files whose checksum differ,
+    # so warm launches extract nothing, and a new build never runs files of the previous one. main.py removes stale folders
+    if (CACHED_EXTRACTION==True):
+        extraction_key = hash_values(
+            cache.files_hash(get_code_files(MAINDIR), MAINDIR),
+            cache.tree_hash(STAGEDDIR, exclude=(STAGEDPAYLOAD,)),
+            payload_key if (APPEND_PAYLOAD==False) else None,
+            get_interpreter_key("nuitka"),
+            args,
+            )
+        print('[INFO]: Onefile unpacks in a cached folder, reused by later launches')
+        args.extend([f"--onefile-tempdir-spec={get_extraction_spec(PRODUCT_ID, extraction_key)}", "--onefile-cache-mode=cached"])
+
     args.append("main.py")
 
-    # Set environment variables to make Nuitka non-interactive
-    env = os.environ.copy()
-    env['NUITKA_ASSUME_YES'] = '1'
-    env['NUITKA_ASSUME_YES_FOR_DOWNLOADS'] = '1'
+    # Inputs of the executable without its appended payload: code, assets, interpreter and arguments
+    bundle_key = hash_values(
+        cache.files_hash(get_code_files(MAINDIR), MAINDIR),
+        cache.tree_hash(STAGEDDIR, exclude=(STAGEDPAYLOAD,)), # The packed payload is covered by payload_key
+        payload_key if (APPEND_PAYLOAD==False) else None,
+        get_interpreter_key("nuitka"),
+        args,
+        )
+    installer_key = hash_values(bundle_key, payload_key if (APPEND_PAYLOAD==True) else None)
+
+    # No-change rebuild
+    if (not cache.changed("installer", installer_key)) and cache.output_unchanged("installer", INSTALLER):
+        cache.save()
+        print("[INFO]: Nothing changed since the last build, skipping")
+        print("[---------------------- END -------------------------------]")
+        return None
 
-    # Prefer running via current interpreter to avoid PATH issues
-    cmd = [sys.executable, "-m", "nuitka"] + args
-    print("[INFO]: Running Nuitka:", " ".join(cmd))
+    if os.path.exists(INSTALLER):
+        print(f'[INFO]: `{INSTALLER_NAME}.exe` already exists.. Removing')
+        os.remove(INSTALLER)
 
-    # Run with environment variables and automatic "yes" responses
-    result = subprocess.run(cmd, env=env, input="yes\nyes\nyes\n", text=True)
-    code = result.returncode
+    if cache.changed("bundle", bundle_key) or (not cache.output_unchanged("bundle", BASEINSTALLER)):
 
-    # build failed?
-    if (code!=0):
-        print(f"[ERROR] Nuitka failed with exit code {code}")
-        sys.exit(code)
+        # Set environment variables to make Nuitka non-interactive
+        env = os.environ.copy()
+        env['NUITKA_ASSUME_YES'] = '1'
+        env['NUITKA_ASSUME_YES_FOR_DOWNLOADS'] = '1'
 
-    # Nuitka creates main.exe, but we want the proper name
-    nuitka_output = os.path.join(RESULTDIR, "main.exe")
+        # Prefer running via current interpreter to avoid PATH issues
+        cmd = [sys.executable, "-m", "nuitka"] + args
+        print("[INFO]: Running Nuitka:", " ".join(cmd))
 
-    # Sanity check
-    if (not os.path.exists(nuitka_output)):
-        print(f"[ERROR] ERROR: build finished but 'main.exe' not found in {RESULTDIR}/")
-        sys.exit(1)
+        # Run with environment variables and automatic "yes" responses
+        result = subprocess.run(cmd, env=env, input="yes\nyes\nyes\n", text=True)
+        code = result.returncode
 
-    # Move and rename the executable
-    print(f"[INFO] Moving executable from '{nuitka_output}' to '{INSTALLER}'")
-    shutil.move(nuitka_output, INSTALLER)
+        # build failed?
+        if (code!=0):
+            print(f"[ERROR] Nuitka failed with exit code {code}")
+            sys.exit(code)
 
-    # Remove the entire dist_nuitka directory
-    print(f"[INFO] Cleaning up build directory: {RESULTDIR}")
-    shutil.rmtree(RESULTDIR)
+        # Nuitka creates main.exe, but we want the proper name
+        nuitka_output = os.path.join(RESULTDIR, "main.exe")
+
+        # Sanity check
+        if (not os.path.exists(nuitka_output)):
+            print(f"[ERROR] ERROR: build finished but 'main.exe' not found in {RESULTDIR}/")
+            sys.exit(1)
+
+        # Keep the executable without payload, a payload-only change then skips Nuitka
+        print(f"[INFO] Moving executable from '{nuitka_output}' to '{BASEINSTALLER}'")
+        shutil.move(nuitka_output, BASEINSTALLER)
+        cache.set("bundle", bundle_key)
+        cache.set_output("bundle", BASEINSTALLER)
+        cache.save()
+    else:
+        print('[INFO]: Code, assets and build arguments unchanged, reusing the previous executable')
+    shutil.copy2(BASEINSTALLER, INSTALLER)
+
+    # Append the payload after the onefile data, the bootstrap never extracts it
+    if (APPEND_PAYLOAD==True) and (payload_key is not None):
+        size_mb = write_payload(PAYLOADDIR, INSTALLER, append=True, codec=PAYLOAD_CODEC) / (1024 * 1024)
+        print(f'[INFO]: Payload appended to the executable ({size_mb:.1f} MB)')
+
+    cache.set("installer", installer_key)
+    cache.set_output("installer", INSTALLER)
+    cache.save()
+
+    # What the executable is made of, compared with the previous build
+    nuitka_dist = os.path.join(RESULTDIR, "main.dist")
+    if os.path.exists(nuitka_dist):
+        entries = collect_folder_bundle(nuitka_dist)
+        if (APPEND_PAYLOAD==True) and (payload_key is not None):
+            entries["<appended payload>"] = {"kind": "payload", "size": os.path.getsize(INSTALLER) - os.path.getsize(BASEINSTALLER)}
+        write_bundle_report(RESULTDIR, entries)
 
     print("[---------------------- END -------------------------------]")
     print(f"[SUCCESS] Executable created: {INSTALLER}")
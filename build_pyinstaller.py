@@ -3,9 +3,13 @@ import os
 import sys
 import tempfile
 import shutil
+from build_utils import bake_assets, stage_assets, optimize_splash, BuildCache, BUILD_CACHE, get_code_files, get_interpreter_key, hash_values
+from build_utils import PROTECTED_MODULES, get_runtime_exclusions, collect_pyinstaller_bundle, write_bundle_report, get_pyinstaller_cookie_relocator
+from payload import write_payload, PAYLOAD_FILENAME
 
 #NOTE: 'pip install pyinstaller' required.
 #NOTE: CONS: PyInstaller is slower than nuitka on paper.
+#      Its onefile bootloader also unpacks to a new temp folder on every launch, build_nuitka.py can reuse a cached one (CACHED_EXTRACTION).
 
 #----------------- **CONFIG HERE** ----------------------
 #--------------------------------------------------------
@@ -13,6 +17,11 @@ import shutil
 PYPATH = "D:\\Softs\\Python\\Python311\\python.exe"
 HIDECONSOLE = True #hide the console (for final build)
 INSTALLER_NAME = 'GeoScatter5.6.1_installer' #name of the installer, no '.' or os illegal characters
+APPEND_PAYLOAD = True #append the payload to the executable, read in place at runtime instead of being extracted to temp with the assets
+PAYLOAD_CODEC = "zlib" #"zlib", "lzma" (smaller, slower) or "store", each payload block is compressed independently so it decompresses on every core
+PILLOW_FREE = True #drop Pillow from the bundle, every image is baked as png and loaded natively by Tk at runtime
+CLEAN_BUILD = False #rebuild everything from scratch, otherwise unchanged steps are skipped and PyInstaller reuses its analysis
+AUTO_EXCLUDE = True #exclude the packages PyInstaller finds but the installer never imports at runtime, derived from an import trace
 
 #----------------------- DIR UTILS ----------------------
 #--------------------------------------------------------
@@ -30,11 +39,19 @@ ASSETSDIR = os.path.join(MAINDIR,'assets') #../ParentFolder/pywiz/assets/
 assert os.path.exists(ASSETSDIR), "[ERROR]: 'assets' directory not found? '../ParentFolder/pywiz/assets/'"
 ICOPATH = os.path.join(ASSETSDIR,'app.ico')
 
+#define payload, the application files to install
+PAYLOADDIR = os.path.join(MAINDIR,'payload') #../ParentFolder/pywiz/payload/
+PAYLOADASSET = os.path.join(ASSETSDIR,PAYLOAD_FILENAME) #../ParentFolder/pywiz/assets/payload.pwz
+
 #define result directory
 RESULTDIR = PROJECTDIR  # D:\Work\ParentFolder\
 BUILDWORKDIR = os.path.join(PROJECTDIR,'buildfiles') #../ParentFolder/build/
 BUILDSPECDIR = os.path.join(PROJECTDIR,'buildfiles') #../ParentFolder/build/
 INSTALLER = os.path.join(RESULTDIR,f'{INSTALLER_NAME}.exe')  # Single file for --onefile
+BASEINSTALLER = os.path.join(BUILDWORKDIR,f'{INSTALLER_NAME}.base.exe') # Executable before the payload is appended, reused while its inputs don't change
+BUILDCACHEFILE = os.path.join(BUILDWORKDIR,BUILD_CACHE) # Hashes of the inputs of the previous build
+STAGEDDIR = os.path.join(BUILDWORKDIR,'assets') # Optimized copy of the assets, the folder that gets bundled
+STAGEDPAYLOAD = os.path.join(STAGEDDIR,PAYLOAD_FILENAME)
 
 #define fallback log file
 TMPDIR = tempfile.gettempdir()
@@ -47,10 +64,32 @@ def build_program():
     """build the program using PyInstaller"""
     print("[---------------------- START -----------------------------]")
 
-    #remove if already exists
-    if os.path.exists(INSTALLER):
-        print(f'[INFO]: `{INSTALLER_NAME}.exe` already exists.. Removing')
-        os.remove(INSTALLER)
+    # Work directories are kept between builds, they hold PyInstaller's cache and ours
+    if (CLEAN_BUILD==True) and os.path.exists(BUILDWORKDIR):
+        print(f'[INFO]: Clean build, removing `{BUILDWORKDIR}`')
+        shutil.rmtree(BUILDWORKDIR)
+    cache = BuildCache(BUILDCACHEFILE)
+
+    # Pre-resize header images and icon to their display size, main.py loads them without resampling nor Pillow.
+    # Jpeg is only a candidate when Pillow is bundled to decode it
+    print('[INFO]: Baking images..')
+    bake_assets(ASSETSDIR, allow_jpeg=(PILLOW_FREE==False))
+
+    # Pack the payload, either bundled with the assets or appended to the executable once built
+    payload_key = cache.tree_hash(PAYLOADDIR)
+    if (APPEND_PAYLOAD==False) and (payload_key is not None):
+        if cache.changed("payload_asset", payload_key) or (not cache.output_unchanged("payload_asset", PAYLOADASSET)):
+            size_mb = write_payload(PAYLOADDIR, PAYLOADASSET, codec=PAYLOAD_CODEC) / (1024 * 1024)
+            print(f'[INFO]: Payload packed in the assets ({size_mb:.1f} MB)')
+            cache.set("payload_asset", payload_key)
+            cache.set_output("payload_asset", PAYLOADASSET)
+        else:
+            print('[INFO]: Payload in the assets is up to date')
+    elif os.path.exists(PAYLOADASSET):
+        os.remove(PAYLOADASSET)
+
+    # Bundle only what the runtime reads, baked images replace their sources
+    stage_assets(ASSETSDIR, STAGEDDIR)
 
     #tell python to build using the
     # Optimized for faster startup with --onefile and splash screen
@@ -61,16 +100,16 @@ def build_program():
         "--distpath", RESULTDIR,
         "--workpath", BUILDWORKDIR,
         "--specpath", BUILDSPECDIR,
-        "--add-data", f"{ASSETSDIR};assets",
+        "--add-data", f"{STAGEDDIR};assets",
         "--optimize", "1",  # Basic Python optimization
         "--noupx",  # Skip UPX compression for faster startup
         ]
 
-    # Add splash screen (requires tkinter and PIL)
+    # Add splash screen (requires tkinter and PIL), resized to what the bootloader shows and stripped of its metadata
     splash_image = os.path.join(ASSETSDIR, "splash.jpg")  # Create this image for splash screen
     if os.path.exists(splash_image):
         print(f'[INFO]: Adding splash screen: {splash_image}')
-        args.extend(["--splash", splash_image])
+        args.extend(["--splash", optimize_splash(splash_image, os.path.join(BUILDWORKDIR, 'splash.png'))])
     else:
         print(f'[WARNING]: Splash image not found: {splash_image}')
         print('[INFO]: Create assets/splash.jpg (400x200 recommended) for better UX')
@@ -78,35 +117,52 @@ def build_program():
     # Hidden imports for sv-ttk theme
     args.extend(["--hidden-import", "sv_ttk"])
 
-    # Aggressive module exclusions to reduce startup time
-    args.extend([
-        # PIL/Pillow modules (keep JPEG and PNG support, exclude others)
-        "--exclude-module", "PIL.BmpImagePlugin",
-        "--exclude-module", "PIL.GifImagePlugin",
-        "--exclude-module", "PIL.PpmImagePlugin",
-        "--exclude-module", "PIL.TiffImagePlugin",
-        "--exclude-module", "PIL.XbmImagePlugin",
-        "--exclude-module", "PIL.XpmImagePlugin",
-        "--exclude-module", "PIL.WmfImagePlugin",
-        "--exclude-module", "PIL.WebPImagePlugin",
-        "--exclude-module", "PIL.SpiderImagePlugin",
-        # NumPy - exclude if not using advanced image processing
-        "--exclude-module", "numpy",
-        "--exclude-module", "numpy.libs",
-        # Tkinter and test modules
-        "--exclude-module", "tkinter.test",
-        "--exclude-module", "tkinter.tix",  # Old tkinter extension
-        # Keep tkinter.ttk - it's needed for ttk widgets
-        "--exclude-module", "test",
-        "--exclude-module", "unittest",
-        "--exclude-module", "doctest",
-        # Safe to exclude:
-        "--exclude-module", "pdb",
-        "--exclude-module", "pydoc",
-        "--exclude-module", "distutils",
-        # Essential modules - DO NOT exclude these:
-        # urllib, ssl, multiprocessing, xml - needed by PyInstaller
-    ])
+    # Pillow is only imported lazily by main.py for images that were not baked
+    if (PILLOW_FREE==True):
+        print('[INFO]: args: --exclude-module PIL: images are baked, Pillow is not bundled')
+        args.extend(["--exclude-module", "PIL"])
+    else:
+        args.extend([
+            # PIL/Pillow modules (keep JPEG and PNG support, exclude others)
+            "--exclude-module", "PIL.BmpImagePlugin",
+            "--exclude-module", "PIL.GifImagePlugin",
+            "--exclude-module", "PIL.PpmImagePlugin",
+            "--exclude-module", "PIL.TiffImagePlugin",
+            "--exclude-module", "PIL.XbmImagePlugin",
+            "--exclude-module", "PIL.XpmImagePlugin",
+            "--exclude-module", "PIL.WmfImagePlugin",
+            "--exclude-module", "PIL.WebPImagePlugin",
+            "--exclude-module", "PIL.SpiderImagePlugin",
+        ])
+
+    # Exclude what static analysis finds but the installer never imports, traced by running main.py headless
+    if (AUTO_EXCLUDE==True):
+        protected = PROTECTED_MODULES + (() if (PILLOW_FREE==True) else ("PIL",)) # Pillow is imported lazily, when it is bundled
+        trace_key = hash_values(cache.files_hash(get_code_files(MAINDIR), MAINDIR), get_interpreter_key("pyinstaller"), protected)
+        excluded = get_runtime_exclusions(cache, MAINDIR, trace_key, protected, excludes=(("PIL",) if (PILLOW_FREE==True) else ()))
+        print(f'[INFO]: args: --exclude-module: {len(excluded)} packages never imported at runtime')
+        for module in excluded:
+            args.extend(["--exclude-module", module])
+    else:
+        # Aggressive module exclusions to reduce startup time
+        args.extend([
+            # NumPy - exclude if not using advanced image processing
+            "--exclude-module", "numpy",
+            "--exclude-module", "numpy.libs",
+            # Tkinter and test modules
+            "--exclude-module", "tkinter.test",
+            "--exclude-module", "tkinter.tix",  # Old tkinter extension
+            # Keep tkinter.ttk - it's needed for ttk widgets
+            "--exclude-module", "test",
+            "--exclude-module", "unittest",
+            "--exclude-module", "doctest",
+            # Safe to exclude:
+            "--exclude-module", "pdb",
+            "--exclude-module", "pydoc",
+            "--exclude-module", "distutils",
+            # Essential modules - DO NOT exclude these:
+            # urllib, ssl, multiprocessing, xml - needed by PyInstaller
+        ])
 
     if (os.path.exists(ICOPATH)):
         print('[INFO]: args: --icon: adding icon to the installer')
@@ -119,32 +175,82 @@ def build_program():
     else:
         print('[INFO]: args: console will be visible (development mode)')
 
+    if (CLEAN_BUILD==True):
+        args.append("--clean")
+
     args.append("main.py")
 
-    # Prefer running via current interpreter to avoid PATH issues
-    cmd = [sys.executable, "-m", "PyInstaller"] + args
-    print("[INFO]: Running PyInstaller:", " ".join(cmd))
+    # Inputs of the executable without its appended payload: code, assets, interpreter and arguments
+    bundle_key = hash_values(
+        cache.files_hash(get_code_files(MAINDIR), MAINDIR),
+        cache.tree_hash(STAGEDDIR, exclude=(STAGEDPAYLOAD,)), # The packed payload is covered by payload_key
+        cache.file_hash(args[args.index("--splash") + 1]) if ("--splash" in args) else None, # Not part of the staged assets
+        payload_key if (APPEND_PAYLOAD==False) else None,
+        get_interpreter_key("pyinstaller"),
+        [arg for arg in args if (arg!="--clean")],
+        )
+    installer_key = hash_values(bundle_key, payload_key if (APPEND_PAYLOAD==True) else None)
 
-    # Run PyInstaller (don't capture output so user can see progress)
-    code = os.spawnv(os.P_WAIT, sys.executable, cmd)
+    # No-change rebuild
+    if (not cache.changed("installer", installer_key)) and cache.output_unchanged("installer", INSTALLER):
+        cache.save()
+        print("[INFO]: Nothing changed since the last build, skipping")
+        print("[---------------------- END -------------------------------]")
+        return None
 
-    # build failed?
-    if (code!=0):
-        print(f"[ERROR] PyInstaller failed with exit code {code}")
-        sys.exit(code)
+    if cache.changed("bundle", bundle_key) or (not cache.output_unchanged("bundle", BASEINSTALLER)):
 
-    # Sanity check
-    if (not os.path.exists(INSTALLER)):
-        print(f"[ERROR] ERROR: build finished but '{INSTALLER_NAME}.exe' not found.")
-        sys.exit(1)
+        #remove if already exists
+        if os.path.exists(INSTALLER):
+            print(f'[INFO]: `{INSTALLER_NAME}.exe` already exists.. Removing')
+            os.remove(INSTALLER)
 
-    # Remove tmp build directory to ensure it's not infecting next build
-    if os.path.exists(BUILDWORKDIR):
-        print(f'[INFO]: buildfiles directory `{BUILDWORKDIR}` already exists.. Removing')
-        shutil.rmtree(BUILDWORKDIR)
-    if os.path.exists(BUILDSPECDIR):
-        print(f'[INFO]: buildfiles directory `{BUILDSPECDIR}` already exists.. Removing')
-        shutil.rmtree(BUILDSPECDIR)
+        # Prefer running via current interpreter to avoid PATH issues
+        cmd = [sys.executable, "-m", "PyInstaller"] + args
+        print("[INFO]: Running PyInstaller:", " ".join(cmd))
+
+        # Run PyInstaller (don't capture output so user can see progress)
+        code = os.spawnv(os.P_WAIT, sys.executable, cmd)
+
+        # build failed?
+        if (code!=0):
+            print(f"[ERROR] PyInstaller failed with exit code {code}")
+            sys.exit(code)
+
+        # Sanity check
+        if (not os.path.exists(INSTALLER)):
+            print(f"[ERROR] ERROR: build finished but '{INSTALLER_NAME}.exe' not found.")
+            sys.exit(1)
+
+        # Keep the executable without payload, a payload-only change then skips PyInstaller
+        shutil.copy2(INSTALLER, BASEINSTALLER)
+        cache.set("bundle", bundle_key)
+        cache.set_output("bundle", BASEINSTALLER)
+        cache.save()
+    else:
+        print('[INFO]: Code, assets and build arguments unchanged, reusing the previous executable')
+        shutil.copy2(BASEINSTALLER, INSTALLER)
+
+    # Append the payload after the bootloader archive, the bootloader never extracts it.
+    # A copy of the archive cookie goes after the payload blocks, so the bootloader doesn't scan back through them on every launch
+    if (APPEND_PAYLOAD==True) and (payload_key is not None):
+        relocator = get_pyinstaller_cookie_relocator(INSTALLER)
+        if (relocator is None):
+            print("[WARNING]: PyInstaller archive cookie not found at the end of the executable, the bootloader will scan through the payload on launch")
+        size_mb = write_payload(PAYLOADDIR, INSTALLER, append=True, codec=PAYLOAD_CODEC, before_index=relocator) / (1024 * 1024)
+        print(f'[INFO]: Payload appended to the executable ({size_mb:.1f} MB)')
+
+    cache.set("installer", installer_key)
+    cache.set_output("installer", INSTALLER)
+    cache.save()
+
+    # What the executable is made of, compared with the previous build
+    pyinstaller_workdir = os.path.join(BUILDWORKDIR, INSTALLER_NAME)
+    if os.path.exists(pyinstaller_workdir):
+        entries = collect_pyinstaller_bundle(pyinstaller_workdir)
+        if (APPEND_PAYLOAD==True) and (payload_key is not None):
+            entries["<appended payload>"] = {"kind": "payload", "size": os.path.getsize(INSTALLER) - os.path.getsize(BASEINSTALLER)}
+        write_bundle_report(BUILDWORKDIR, entries)
 
     # Analyze the final executable size
     if os.path.exists(INSTALLER):
@@ -0,0 +1,520 @@
+import os
+import io
+import re
+import ast
+import sys
+import json
+import math
+import shutil
+import struct
+import hashlib
+import subprocess
+import modulefinder
+import importlib.metadata
+
+#NOTE: shared helpers for 'build_pyinstaller.py' and 'build_nuitka.py'.
+#NOTE: 'pip install pillow' required (build time only).
+
+HEADER_WIDTH = 720 #final display width of the header images, must match main.py
+ICON_SIZE = 64 #window icon size, loaded through a tk.PhotoImage outside of Windows
+BAKED_DIRNAME = 'baked' #../pywiz/assets/baked/
+BAKED_MANIFEST = 'manifest.json'
+IMAGE_MIN_PSNR = 33.0 #dB against the resized image, lossy encodings below are rejected, raise it to keep the images lossless
+JPEG_QUALITIES = (95, 90, 85, 80, 75, 70) #tried from the best, jpeg is only used when Pillow is bundled, Tk can't decode it
+SPLASH_MAX_SIZE = (760, 480) #PyInstaller downscales bigger splash images anyway
+BUILD_ONLY_ASSETS = ('splash.jpg', 'splash.png') #consumed by the build tools, never read at runtime
+EXTRACTION_ROOT = 'PyWiz' #cached onefile extractions go to {CACHE_DIR}/PyWiz/<product id>/<bundle hash>/
+EXTRACTION_MARKER = 'extraction_cache.json' #staged with the assets, tells main.py which cache folder holds stale extractions
+BUILD_CACHE = 'pywiz_build_cache.json' #written in the build work directory
+BUNDLE_REPORT = 'bundle_report' #.json and .txt written in the build work directory, the previous json is diffed
+PYI_COOKIE = struct.Struct('!8sIIII64s') #PyInstaller archive cookie: magic, archive length, toc offset, toc length, python version, python library
+PYI_COOKIE_MAGIC = b'MEI\014\013\012\013\016'
+
+# Never excluded even if the import trace does not see them: imported lazily on paths the trace can't run
+PROTECTED_MODULES = (
+    "encodings", # Codecs are looked up by name
+    "tkinter", # Dialog and file picker submodules
+    "inspect", "pkgutil", # PyInstaller runtime hooks
+    "subprocess", "signal", "select", "selectors", # Lazily imported by many stdlib modules
+    "locale", "_strptime", "datetime", "calendar", # Time and locale formatting
+    "pwd", "grp", # os.path.expanduser() and shutil on posix
+    "unicodedata", # idna codec
+    "ctypes", # Windows only code paths
+    )
+
+# Imports main.py then runs the headless code paths of the installer, prints every module loaded.
+# The protected modules given as arguments are imported too, so their own module level imports are kept
+TRACE_SCRIPT = """
+import os, sys, json, zipfile, tempfile, importlib
+sys.path.insert(0, os.getcwd())
+for name in sys.argv[1:]:
+    try: importlib.import_module(name)
+    except ImportError:
+        pass
+import main
+from payload import write_payload
+from install_engine import InstallEngine
+with tempfile.TemporaryDirectory() as tmp:
+    src = os.path.join(tmp, 'src')
+    os.makedirs(os.path.join(src, 'docs'))
+    for name in ('app.bin', 'docs/readme.txt'):
+        with open(os.path.join(src, name), 'wb') as f:
+            f.write(os.urandom(1024) + bytes(4096))
+    payloads = []
+    for codec in ('zlib', 'lzma', 'store'):
+        payloads.append(os.path.join(tmp, codec + '.pwz'))
+        write_payload(src, payloads[-1], codec=codec)
+    payloads.append(os.path.join(tmp, 'payload.zip'))
+    with zipfile.ZipFile(payloads[-1], 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.write(os.path.join(src, 'app.bin'), 'app.bin')
+    for i, path in enumerate(payloads):
+        InstallEngine(path, os.path.join(tmp, f'install_{i}')).run()
+    main.check_install_dir(tmp, 'Standard')
+    answers = os.path.join(tmp, 'answers.json')
+    with open(answers, 'w', encoding='utf-8') as f:
+        json.dump({"license1_accepted": True, "install_dir": os.path.join(tmp, 'silent')}, f)
+    main.run_silent_install(['--silent', '--answers', answers, '--threads', '2', '--payload', payloads[0]])
+print(json.dumps(sorted(sys.modules)))
+"""
+
+#-------------------------- HASH ------------------------
+#--------------------------------------------------------
+
+def file_sha256(path, chunk_size=1024*1024):
+    """return the sha256 hex digest of the given file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_values(*values):
+    """sha256 of json serializable values"""
+    return hashlib.sha256(json.dumps(values, sort_keys=True).encode('utf-8')).hexdigest()
+
+#-------------------------- CACHE -----------------------
+#--------------------------------------------------------
+
+def get_code_files(main_dir):
+    """python modules bundled in the executable, every top level module except the build and benchmark scripts"""
+    return sorted(os.path.join(main_dir, f) for f in os.listdir(main_dir)
+                  if f.endswith('.py') and (not f.startswith(('build_', 'benchmark'))))
+
+def get_interpreter_key(tool):
+    """interpreter and build tool versions, a change invalidates everything they compiled"""
+    try: tool_version = importlib.metadata.version(tool)
+    except importlib.metadata.PackageNotFoundError:
+        tool_version = None
+    return hash_values(sys.executable, sys.version, tool, tool_version)
+
+class BuildCache:
+    """content hashes of the build inputs from the previous build, files whose size and mtime did not change reuse their hash"""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except Exception as e:
+                print(f"[WARNING]: Ignoring unreadable build cache '{path}': {e}")
+        self.files = self.data.setdefault("files", {}) #abs path -> [size, mtime_ns, sha256]
+        self.keys = self.data.setdefault("keys", {}) #build step -> hash of its inputs when it last ran
+
+    def file_hash(self, path):
+        stat = os.stat(path)
+        entry = self.files.get(path)
+        if (entry is not None) and (entry[0]==stat.st_size) and (entry[1]==stat.st_mtime_ns):
+            return entry[2]
+        digest = file_sha256(path)
+        self.files[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def files_hash(self, paths, root):
+        """hash of the relative paths and contents of the given files"""
+        return hash_values([(os.path.relpath(path, root).replace(os.sep, '/'), self.file_hash(path)) for path in sorted(paths)])
+
+    def tree_hash(self, root, exclude=()):
+        """hash of every file under root, None if root does not exist"""
+        if (not os.path.exists(root)):
+            return None
+        paths = []
+        for folder, dirs, filenames in os.walk(root):
+            paths += [os.path.join(folder, f) for f in filenames if (os.path.join(folder, f) not in exclude)]
+        return self.files_hash(paths, root)
+
+    def changed(self, step, key) -> bool:
+        return (self.keys.get(step)!=key)
+
+    def set(self, step, key):
+        self.keys[step] = key
+        return None
+
+    def get_output_stat(self, path):
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def output_unchanged(self, step, path) -> bool:
+        """the output of the step is still the file it wrote"""
+        return os.path.exists(path) and (self.data.get("outputs", {}).get(step)==self.get_output_stat(path))
+
+    def set_output(self, step, path):
+        self.data.setdefault("outputs", {})[step] = self.get_output_stat(path)
+        return None
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=1)
+        return None
+
+#------------------------ IMPORTS -----------------------
+#--------------------------------------------------------
+
+def trace_runtime_imports(main_dir, protected=PROTECTED_MODULES):
+    """modules actually loaded by main.py and the headless install paths, traced in a fresh interpreter"""
+    result = subprocess.run([sys.executable, "-c", TRACE_SCRIPT, *protected], cwd=main_dir, capture_output=True, text=True)
+    if (result.returncode!=0):
+        raise RuntimeError(f"import trace failed:\n{result.stderr}")
+    return set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+def find_static_imports(main_file, excludes=()):
+    """modules reachable from main.py by static analysis, what a freezer bundles"""
+    finder = modulefinder.ModuleFinder(path=[os.path.dirname(main_file)] + sys.path, excludes=list(excludes))
+    finder.run_script(main_file)
+    return set(finder.modules)
+
+def derive_exclusions(static, runtime, protected=PROTECTED_MODULES):
+    """top level packages found by static analysis of which no module is loaded at runtime,
+    private and builtin modules are left alone, the freezer needs them for its own bootstrap"""
+    runtime_packages = {name.split('.')[0] for name in runtime}
+    excluded = set()
+    for name in static:
+        package = name.split('.')[0]
+        if (package in runtime_packages) or (package in protected) or package.startswith('_') or (package in sys.builtin_module_names):
+            continue
+        excluded.add(package)
+    return sorted(excluded)
+
+def get_runtime_exclusions(cache, main_dir, key, protected=PROTECTED_MODULES, excludes=()):
+    """derive the exclusions from the import trace, cached in the build cache until the code or interpreter change"""
+    if (not cache.changed("import_trace", key)) and ("excluded_modules" in cache.data):
+        print('[INFO]: Import trace is up to date')
+        return cache.data["excluded_modules"]
+    print('[INFO]: Tracing runtime imports..')
+    runtime = trace_runtime_imports(main_dir, protected)
+    static = find_static_imports(os.path.join(main_dir, 'main.py'), excludes)
+    excluded = derive_exclusions(static, runtime, protected)
+    print(f'[INFO]: {len(static)} modules found statically, {len(runtime)} loaded at runtime, {len(excluded)} packages excluded')
+    cache.data["excluded_modules"] = excluded
+    cache.set("import_trace", key)
+    return excluded
+
+#------------------------- REPORT -----------------------
+#--------------------------------------------------------
+
+TOC_ENTRY = re.compile(r"\(\s*'(?:[^'\\]|\\.)*'\s*,\s*(?:'(?:[^'\\]|\\.)*'|None)\s*,\s*'[A-Z_]+'\s*\)")
+
+def read_toc_entries(toc_path):
+    """(name, source path, typecode) entries of a PyInstaller .toc file"""
+    with open(toc_path, 'r', encoding='utf-8') as f:
+        return [ast.literal_eval(match) for match in TOC_ENTRY.findall(f.read())]
+
+def collect_pyinstaller_bundle(work_dir):
+    """name -> {kind, size} of everything PyInstaller packed, python modules are sized by their source file"""
+    entries = {}
+    tocs = sorted(f for f in os.listdir(work_dir) if f.endswith('.toc') and f.startswith(('PYZ-', 'PKG-', 'EXE-')))
+    for toc in tocs:
+        for name, path, typecode in read_toc_entries(os.path.join(work_dir, toc)):
+            if (path is None) or (not os.path.isfile(path)) or (name in entries) or (typecode in ('PYZ', 'PKG')):
+                continue
+            entries[name] = {"kind": typecode.lower(), "size": os.path.getsize(path)}
+    return entries
+
+def get_pyinstaller_cookie_relocator(exe_path):
+    """return before_index(offset) for write_payload, a copy of the executable's archive cookie placed after the payload blocks,
+    or None if the executable doesn't end with a PyInstaller archive"""
+    #NOTE: the bootloader finds its archive by scanning the executable back to front for the cookie, through every byte appended after it.
+    #      The copy is found within the last bytes of the payload instead, its archive length grown so it still points at the same archive.
+    with open(exe_path, 'rb') as f:
+        cookie_pos = f.seek(0, os.SEEK_END) - PYI_COOKIE.size
+        if (cookie_pos < 0):
+            return None
+        f.seek(cookie_pos)
+        magic, pkg_length, toc_offset, toc_length, python_version, python_libname = PYI_COOKIE.unpack(f.read(PYI_COOKIE.size))
+    if (magic!=PYI_COOKIE_MAGIC):
+        return None
+
+    def before_index(offset):
+        length = pkg_length + (offset - cookie_pos)
+        if (length >= 2**32): # Archive length is 32 bits, the bootloader falls back to scanning up to the original cookie
+            print("[WARNING]: Payload too large to relocate the PyInstaller archive cookie, the bootloader will scan through it on launch")
+            return b''
+        return PYI_COOKIE.pack(magic, length, toc_offset, toc_length, python_version, python_libname)
+    return before_index
+
+def collect_folder_bundle(dist_dir):
+    """name -> {kind, size} of every file of a standalone distribution folder (Nuitka main.dist)"""
+    entries = {}
+    for root, dirs, filenames in os.walk(dist_dir):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            kind = "binary" if filename.lower().endswith(('.dll', '.pyd', '.so', '.exe')) else "data"
+            entries[os.path.relpath(path, dist_dir).replace(os.sep, '/')] = {"kind": kind, "size": os.path.getsize(path)}
+    return entries
+
+def write_bundle_report(report_dir, entries, top=20):
+    """write the bundle composition as json and text, with the biggest entries, totals per kind and the diff with the previous report"""
+    json_path = os.path.join(report_dir, BUNDLE_REPORT + '.json')
+    previous = {}
+    if os.path.exists(json_path):
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)["entries"]
+        except Exception as e:
+            print(f"[WARNING]: Could not read previous bundle report '{json_path}': {e}")
+
+    kb = lambda size: f"{size / 1024:10.1f} KB"
+    lines = []
+    totals = {}
+    for entry in entries.values():
+        totals[entry["kind"]] = totals.get(entry["kind"], 0) + entry["size"]
+    lines.append(f"[BUNDLE] {len(entries)} entries, {kb(sum(totals.values())).strip()} (uncompressed)")
+    for kind, size in sorted(totals.items(), key=lambda item: -item[1]):
+        lines.append(f"  {kb(size)}  {kind}")
+
+    lines.append(f"[BUNDLE] Biggest {top} entries:")
+    for name, entry in sorted(entries.items(), key=lambda item: -item[1]["size"])[:top]:
+        lines.append(f"  {kb(entry['size'])}  {entry['kind']:<10} {name}")
+
+    if previous:
+        changes = []
+        for name in set(entries) | set(previous):
+            delta = entries.get(name, {}).get("size", 0) - previous.get(name, {}).get("size", 0)
+            if (delta!=0):
+                status = "added" if (name not in previous) else "removed" if (name not in entries) else "changed"
+                changes.append((delta, status, name))
+        total_delta = sum(delta for delta, status, name in changes)
+        lines.append(f"[BUNDLE] Since the previous build: {len(changes)} entries changed, {total_delta / 1024:+.1f} KB")
+        for delta, status, name in sorted(changes, key=lambda change: -abs(change[0]))[:top]:
+            lines.append(f"  {delta / 1024:+10.1f} KB  {status:<8} {name}")
+
+    os.makedirs(report_dir, exist_ok=True)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"totals": totals, "entries": entries}, f, indent=1)
+    with open(os.path.join(report_dir, BUNDLE_REPORT + '.txt'), 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    print("\n".join(lines))
+    return None
+
+#------------------------- ASSETS -----------------------
+#--------------------------------------------------------
+
+def get_psnr(reference, image):
+    """peak signal to noise ratio of image against reference in dB, inf when identical"""
+    from PIL import ImageChops, ImageStat
+    diff = ImageChops.difference(reference.convert('RGB'), image.convert('RGB'))
+    mse = sum(ImageStat.Stat(diff).sum2) / (3 * reference.width * reference.height)
+    return math.inf if (mse==0) else 10 * math.log10(255 ** 2 / mse)
+
+def encode_image(image, allow_jpeg=False, min_psnr=IMAGE_MIN_PSNR):
+    """smallest encoding of the image, without metadata, among lossless png, 256 colors png and jpeg when allowed,
+    lossy ones only if they keep min_psnr, return (format, bytes, psnr)"""
+    from PIL import Image
+    image.info = {} # Strip exif, icc profile, dpi..
+    candidates = []
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    candidates.append(("png", buffer.getvalue(), math.inf))
+
+    if (image.mode=='RGB'):
+        palette = image.quantize(colors=256, dither=Image.Dither.FLOYDSTEINBERG)
+        psnr = get_psnr(image, palette)
+        if (psnr >= min_psnr):
+            buffer = io.BytesIO()
+            palette.save(buffer, format='PNG', optimize=True)
+            candidates.append(("png", buffer.getvalue(), psnr))
+
+        # Lowest jpeg quality still above the threshold
+        if allow_jpeg:
+            jpeg = None
+            for quality in JPEG_QUALITIES:
+                buffer = io.BytesIO()
+                image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+                psnr = get_psnr(image, Image.open(io.BytesIO(buffer.getvalue())))
+                if (psnr < min_psnr):
+                    break
+                jpeg = ("jpeg", buffer.getvalue(), psnr)
+            if (jpeg is not None):
+                candidates.append(jpeg)
+
+    return min(candidates, key=lambda candidate: len(candidate[1]))
+
+def bake_assets(assets_dir, width=HEADER_WIDTH, icon_size=ICON_SIZE, allow_jpeg=False, min_psnr=IMAGE_MIN_PSNR):
+    """resize the header images and the icon to their display size, encode each one in the smallest format the runtime can load
+    (png for Tk, jpeg only if Pillow is bundled), deduplicate identical results, and write a manifest"""
+    from PIL import Image
+
+    baked_dir = os.path.join(assets_dir, BAKED_DIRNAME)
+    os.makedirs(baked_dir, exist_ok=True)
+    manifest_path = os.path.join(baked_dir, BAKED_MANIFEST)
+    settings = {"allow_jpeg": allow_jpeg, "min_psnr": min_psnr}
+
+    # Previous manifest, used to skip images that are already up to date
+    previous = {}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get("width")==width) and (data.get("settings")==settings):
+                previous = data.get("images", {})
+        except Exception as e:
+            print(f"[WARNING]: Could not read baked manifest '{manifest_path}': {e}")
+
+    # Sources to bake: image_key -> source filename
+    sources = {}
+    for filename in sorted(os.listdir(assets_dir)):
+        name, ext = os.path.splitext(filename)
+        if name.startswith('header_page') and (ext.lower() in ('.jpg', '.jpeg', '.png')):
+            sources[name.replace('header_', '')] = filename #'page1'
+    if os.path.exists(os.path.join(assets_dir, 'app.ico')):
+        sources["icon"] = 'app.ico'
+
+    images = {}
+    written = {} #sha256 of the baked bytes -> baked filename, identical images share one file
+    for image_key, filename in sources.items():
+        source_path = os.path.join(assets_dir, filename)
+        source_sha256 = file_sha256(source_path)
+
+        entry = previous.get(image_key)
+        if (entry is not None) and (entry.get("source_sha256")==source_sha256) and os.path.exists(os.path.join(baked_dir, entry["file"])):
+            print(f"[INFO]: Baked image '{entry['file']}' is up to date")
+            images[image_key] = entry
+            written.setdefault(entry.get("sha256"), entry["file"])
+            continue
+
+        image = Image.open(source_path)
+        if (image_key=="icon"):
+            size = (icon_size, icon_size) # .ico opens at its largest embedded size
+            image = image.convert('RGBA').resize(size, Image.LANCZOS)
+            image_format, data, psnr = encode_image(image, allow_jpeg=False, min_psnr=math.inf) # Loaded with tk.PhotoImage(file=)
+        else:
+            size = (width, int(width * (image.height / image.width))) # Same rounding as main.py runtime fallback
+            image = image.convert('RGB').resize(size, Image.LANCZOS)
+            image_format, data, psnr = encode_image(image, allow_jpeg, min_psnr)
+
+        digest = hashlib.sha256(data).hexdigest()
+        if (digest in written):
+            baked_file = written[digest]
+            print(f"[INFO]: Baked image '{filename}' is identical to '{baked_file}', shared")
+        else:
+            baked_file = written[digest] = f"{os.path.splitext(filename)[0]}.{'jpg' if (image_format=='jpeg') else 'png'}"
+            with open(os.path.join(baked_dir, baked_file), 'wb') as f:
+                f.write(data)
+            quality = "lossless" if (psnr==math.inf) else f"{psnr:.1f} dB"
+            print(f"[INFO]: Baked image '{filename}' -> '{baked_file}' ({size[0]}x{size[1]}, {quality}, {os.path.getsize(source_path) // 1024} KB -> {len(data) // 1024} KB)")
+
+        images[image_key] = {
+            "file": baked_file,
+            "format": image_format,
+            "sha256": digest,
+            "source": filename,
+            "source_size": os.path.getsize(source_path),
+            "source_sha256": source_sha256,
+            "size": list(size),
+            }
+
+    # Remove baked files of a previous format or of removed sources, they would be bundled for nothing
+    used = {entry["file"] for entry in images.values()}
+    for filename in os.listdir(baked_dir):
+        if (filename!=BAKED_MANIFEST) and (filename not in used):
+            os.remove(os.path.join(baked_dir, filename))
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({"width": width, "settings": settings, "images": images}, f, indent=1)
+
+    return images
+
+def optimize_splash(source_path, dst_path, max_size=SPLASH_MAX_SIZE, min_psnr=IMAGE_MIN_PSNR):
+    """splash at the size the bootloader shows it, without metadata, as the smallest png (PyInstaller converts it to png anyway)"""
+    from PIL import Image
+    source_sha256 = file_sha256(source_path)
+    stamp_path = dst_path + '.sha256'
+    if os.path.exists(dst_path) and os.path.exists(stamp_path):
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            if (f.read()==hash_values(source_sha256, max_size, min_psnr)):
+                return dst_path
+    image = Image.open(source_path).convert('RGB')
+    image.thumbnail(max_size, Image.LANCZOS) # Only ever shrinks, keeps the aspect ratio
+    image_format, data, psnr = encode_image(image, allow_jpeg=False, min_psnr=min_psnr)
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    with open(dst_path, 'wb') as f:
+        f.write(data)
+    with open(stamp_path, 'w', encoding='utf-8') as f:
+        f.write(hash_values(source_sha256, max_size, min_psnr))
+    print(f"[INFO]: Splash optimized {image.width}x{image.height} ({os.path.getsize(source_path) // 1024} KB -> {len(data) // 1024} KB png)")
+    return dst_path
+
+def get_extraction_spec(product_id, key):
+    """nuitka --onefile-tempdir-spec unpacking in the user cache, one folder per bundle content under a product folder
+    shared by every version, reused by later launches"""
+    return f"{{CACHE_DIR}}/{EXTRACTION_ROOT}/{product_id}/{key[:16]}"
+
+def get_extraction_marker(product_id):
+    """content of EXTRACTION_MARKER, the cache folder main.py may clean from the extractions of other builds and versions"""
+    return json.dumps({"root": f"{EXTRACTION_ROOT}/{product_id}"})
+
+def stage_assets(assets_dir, staging_dir, extra_files=None):
+    """mirror in staging_dir only the assets read at runtime: baked images instead of their sources, no build-only files,
+    plus extra_files {relpath: text} generated by the build.
+    Unchanged files keep their mtime so the build cache does not rehash them, the staging dir is what gets bundled"""
+    extra_files = extra_files or {}
+    baked_sources = set()
+    manifest_path = os.path.join(assets_dir, BAKED_DIRNAME, BAKED_MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            images = json.load(f).get("images", {})
+        baked_sources = {entry["source"] for key, entry in images.items() if (key!="icon")} # app.ico is still used on Windows
+
+    wanted = {}
+    for root, dirs, filenames in os.walk(assets_dir):
+        for filename in filenames:
+            relpath = os.path.relpath(os.path.join(root, filename), assets_dir)
+            if (relpath in baked_sources) or (relpath in BUILD_ONLY_ASSETS):
+                continue
+            wanted[relpath] = os.path.join(root, filename)
+
+    # Remove what is not wanted anymore, then copy what changed
+    if os.path.exists(staging_dir):
+        for root, dirs, filenames in os.walk(staging_dir):
+            for filename in filenames:
+                relpath = os.path.relpath(os.path.join(root, filename), staging_dir)
+                if (relpath not in wanted) and (relpath not in extra_files):
+                    os.remove(os.path.join(root, filename))
+    for relpath, source in wanted.items():
+        target = os.path.join(staging_dir, relpath)
+        if os.path.exists(target) and (os.path.getsize(target)==os.path.getsize(source)) and (os.path.getmtime(target)==os.path.getmtime(source)):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            os.remove(target)
+        try: os.link(source, target) # Big payloads are not copied
+        except OSError:
+            shutil.copy2(source, target)
+    for relpath, text in extra_files.items():
+        target = os.path.join(staging_dir, relpath)
+        if os.path.exists(target):
+            with open(target, 'r', encoding='utf-8') as f:
+                if (f.read()==text):
+                    continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    # Bytes saved compared with bundling the assets folder as is
+    before = sum(os.path.getsize(os.path.join(root, f)) for root, dirs, filenames in os.walk(assets_dir) for f in filenames)
+    after = sum(os.path.getsize(path) for path in wanted.values())
+    print(f"[INFO]: Assets staged: {before / 1024:.0f} KB -> {after / 1024:.0f} KB ({(before - after) / 1024:.0f} KB saved)")
+    return before, after
@@ -0,0 +1,592 @@
+import os
+import json
+import time
+import queue
+import hashlib
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from payload import open_payload, decompress_block, DEFAULT_COMPONENT
+
+#NOTE: the install engine is independent from tkinter, it can be driven by the wizard, a script or a test.
+#NOTE: state changes are reported through a thread-safe queue of (kind, data) events:
+#      ("plan",     (write_files, unchanged_files, removed_files))
+#      ("start",    (total_bytes, total_files))   only what has to be written, total_bytes counts the bytes of every phase
+#      ("resume",   (done_bytes, done_files))     resuming an interrupted install, work already done counts as progress
+#      ("phase",    phase_name)                   "verify_payload", "extract", "remove" or "verify_install"
+#      ("error",    (member_path, message))
+#      ("done",     success_bool)
+#NOTE: byte and file progress is too frequent for a queue, workers add it to a ProgressBus read once per frame.
+#NOTE: completed work is appended to a journal in the install directory, an interrupted install resumes from it.
+
+CHUNK_SIZE = 1024 * 1024 #bytes copied per read, progress is posted once per chunk
+MANIFEST_FILENAME = '.pywiz_manifest.json' #written in the install directory, lets a later install only write what changed
+JOURNAL_FILENAME = '.pywiz_journal' #append-only record of the completed work, removed once the install succeeded
+JOURNAL_SYNC_S = 1.0 #seconds between two commits of the journal while tasks run, an interruption loses about this much work
+
+def format_progress(rate, eta):
+    """'12.3 MB/s, 42 s left' from a ProgressBus snapshot"""
+    text = f"{rate / (1024 * 1024):.1f} MB/s"
+    if (eta is not None):
+        minutes, seconds = divmod(int(eta + 0.5), 60)
+        text += f", {minutes} min {seconds:02d} s left" if minutes else f", {seconds} s left"
+    return text
+
+class ProgressBus:
+    """Coalesce the byte and file deltas posted by the workers, the UI reads one snapshot per frame"""
+
+    def __init__(self, window=3.0):
+        self.lock = threading.Lock()
+        self.window = window #seconds of history used for the moving average throughput
+        self.samples = collections.deque() #(time, done_bytes) history for the moving average
+        self.reset(0, 0)
+
+    def reset(self, total_bytes, total_files):
+        with self.lock:
+            self.total_bytes, self.total_files = total_bytes, total_files
+            self.done_bytes, self.done_files = 0, 0
+            self.samples.clear()
+        return None
+
+    def add(self, bytes_delta=0, files_delta=0):
+        """Workers: post progress, only two additions under an uncontended lock"""
+        with self.lock:
+            self.done_bytes += bytes_delta
+            self.done_files += files_delta
+        return None
+
+    def snapshot(self):
+        """Reader: (done_bytes, total_bytes, done_files, total_files, bytes_per_second, eta_seconds or None)"""
+        now = time.perf_counter()
+        with self.lock:
+            done_bytes, total_bytes = self.done_bytes, self.total_bytes
+            done_files, total_files = self.done_files, self.total_files
+            self.samples.append((now, done_bytes))
+            while (len(self.samples) > 2) and (now - self.samples[0][0] > self.window):
+                self.samples.popleft()
+            first_time, first_bytes = self.samples[0]
+        rate = (done_bytes - first_bytes) / (now - first_time) if (now > first_time) else 0.0
+        eta = (total_bytes - done_bytes) / rate if (rate > 0) else None
+        return done_bytes, total_bytes, done_files, total_files, rate, eta
+
+class InstallJournal:
+    """Append-only journal of the work done by an install, one json line per record.
+    Records are committed periodically by the thread running the install: the files written since the last commit are flushed to disk first,
+    then the records describing them, so the journal never claims data that could still be lost"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock() #guards pending and dirty, taken by every worker
+        self.commit_lock = threading.Lock() #one commit at a time, keeps the records in order
+        self.pending = [] #records not committed yet
+        self.dirty = set() #files written by the pending records
+        self.last_commit = time.monotonic()
+
+    @staticmethod
+    def read(path):
+        """(header, records) of a journal, None if there is none or it is unreadable, a torn last line is ignored"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                records = []
+                for line in f:
+                    try: records.append(json.loads(line))
+                    except ValueError: # Interrupted while appending
+                        break
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(header, dict)) or (header.get("version")!=1):
+            return None
+        return header, records
+
+    def create(self, header):
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file.write(json.dumps(header, separators=(',', ':')) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return None
+
+    def reopen(self):
+        self.file = open(self.path, 'a', encoding='utf-8')
+        return None
+
+    def record(self, record, dirty_path=None):
+        """Workers: queue a record once its work is done, committed with the next periodic commit"""
+        with self.lock:
+            self.pending.append(record)
+            if (dirty_path is not None):
+                self.dirty.add(dirty_path)
+        return None
+
+    def get_commit_delay(self):
+        """Seconds until the next periodic commit is due, None while no journal is open"""
+        if (self.file is None):
+            return None
+        return max(0.0, self.last_commit + JOURNAL_SYNC_S - time.monotonic())
+
+    def commit_if_due(self):
+        if (self.get_commit_delay()==0.0):
+            self.commit(blocking=False)
+        return None
+
+    def commit(self, blocking=True):
+        """Flush the files written by the pending records, then append and flush the records"""
+        if (self.file is None) or (not self.commit_lock.acquire(blocking=blocking)):
+            return None # Another worker is committing
+        try:
+            with self.lock:
+                records, dirty = self.pending, self.dirty
+                self.pending, self.dirty = [], set()
+                self.last_commit = time.monotonic()
+            for path in dirty:
+                try:
+                    with open(path, 'r+b') as f: # Windows can't flush a read-only handle
+                        os.fsync(f.fileno())
+                except OSError: # Removed meanwhile, a resume checks the files again
+                    pass
+            if records:
+                self.file.write(''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records))
+                self.file.flush()
+                os.fsync(self.file.fileno())
+        finally:
+            self.commit_lock.release()
+        return None
+
+    def close(self):
+        """Commit what is left, the journal stays for a later resume"""
+        if (self.file is not None):
+            self.commit()
+            self.file.close()
+            self.file = None
+        return None
+
+    def remove(self):
+        if (self.file is not None):
+            self.file.close()
+            self.file = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        return None
+
+def new_member_state():
+    """Work done on a member, see InstallEngine.load_journal()"""
+    return {"p": set(), "b": set(), "f": False, "v": set()}
+
+class IntegrityError(Exception):
+    """A payload chunk or an installed file does not match its sha256 manifest"""
+
+class InstallEngine:
+    """Extract a payload (see payload.py) into a directory using a pool of worker threads"""
+
+    def __init__(self, payload_path, install_dir, workers=4, verify=True, components=None, resume=True):
+        self.payload_path = payload_path
+        self.install_dir = os.path.abspath(install_dir)
+        self.workers = max(1, int(workers))
+        self.verify = verify #check the payload before extraction and the installed files after, when the payload has a sha256 manifest
+        self.components = components #components to install, None for all of them, see payload.get_component()
+        self.resume = resume #continue an interrupted install of the same payload from its journal, otherwise start over
+        self.journal = InstallJournal(os.path.join(self.install_dir, JOURNAL_FILENAME))
+        self.events = queue.Queue()
+        self.progress = ProgressBus()
+        self.cancelled = threading.Event() #set by the user
+        self.aborted = threading.Event() #set on integrity errors, no point going on with corrupted data
+        self.thread = None
+        self.reader = None
+        self.pending_blocks = {} #member path -> blocks left to write
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Run the installation in a background thread, returns immediately"""
+        self.thread = threading.Thread(target=self.run, name="pywiz_install", daemon=True)
+        self.thread.start()
+        return None
+
+    def cancel(self):
+        """Ask the workers to stop after their current chunk"""
+        self.cancelled.set()
+        return None
+
+    def stopping(self) -> bool:
+        """Workers check this between chunks"""
+        return self.cancelled.is_set() or self.aborted.is_set()
+
+    def is_running(self) -> bool:
+        return (self.thread is not None) and self.thread.is_alive()
+
+    def drain_events(self, max_events=1000):
+        """Return the events posted since the last call, never blocks"""
+        events = []
+        while (len(events) < max_events):
+            try: events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def run(self) -> bool:
+        """Run the installation in the calling thread, returns True on success"""
+        try:
+            self.reader = open_payload(self.payload_path)
+            members = self.select_members(self.reader.members)
+            verify = self.can_verify(members)
+
+            # Continue an interrupted install, or upgrade over a previous one: only write new or changed files, remove the ones gone from the payload
+            resumed = self.load_journal(members, self.reader.block_size) if self.resume else None
+            if (resumed is not None):
+                write, remove, done = resumed
+                unchanged = [member for member in members if (member["path"] not in done)]
+                self.journal.reopen()
+            else:
+                write, unchanged, remove = self.plan_upgrade(members)
+                done = {member["path"]: new_member_state() for member in write}
+                self.journal.remove() # Journal of another payload, or starting over
+                os.makedirs(self.install_dir, exist_ok=True)
+                if (write or remove):
+                    self.journal.create({"version": 1, "plan": self.get_plan_key(members, self.reader.block_size),
+                                         "write": [member["path"] for member in write], "remove": remove})
+            self.events.put(("plan", (len(write), len(unchanged), len(remove))))
+            write_bytes = sum(member["size"] for member in write)
+            self.progress.reset(write_bytes * (3 if verify else 1), len(write))
+            self.events.put(("start", (write_bytes * (3 if verify else 1), len(write))))
+            if (resumed is not None):
+                done_bytes, done_files = self.get_done_work(write, done, verify, self.reader.block_size)
+                self.progress.add(done_bytes, done_files)
+                self.events.put(("resume", (done_bytes, done_files)))
+
+            # Blocks are the unit of work, zlib/lzma/hashlib release the GIL so they scale across threads, work in the journal is skipped
+            chunk_tasks, verify_tasks, block_tasks, block_members, prepare_tasks, finish_tasks = [], [], [], [], [], []
+            for member in write:
+                state = done[member["path"]]
+                chunk_tasks += [(member, idx) for idx in range(len(member.get("chunks", []))) if (idx not in state["v"])]
+                if ("blocks" not in member) or state["f"]:
+                    continue
+                block_members.append(member)
+                verify_tasks += [(member, idx) for idx in range(len(member["blocks"])) if (idx not in state["p"]) and (idx not in state["b"])]
+                block_tasks += [(member, idx) for idx in range(len(member["blocks"])) if (idx not in state["b"])]
+                if (not state["b"]):
+                    prepare_tasks.append((member,)) # Partly written files are kept as they are
+                elif (len(state["b"])==len(member["blocks"])):
+                    finish_tasks.append((member,)) # Interrupted right after its last block
+            stream_tasks = [(member,) for member in write if ("blocks" not in member) and (not done[member["path"]]["f"])] # Zip payloads
+            self.pending_blocks = {member["path"]: len(member["blocks"]) - len(done[member["path"]]["b"]) for member in block_members}
+
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pywiz_install") as pool:
+                success = True
+                if verify:
+                    self.events.put(("phase", "verify_payload"))
+                    success = self.run_tasks(pool, self.verify_payload_block, verify_tasks)
+                if success and (write or remove):
+                    self.remove_installed_manifest() # The directory no longer matches it until the end
+                if success:
+                    self.events.put(("phase", "extract"))
+                    success = self.run_tasks(pool, self.prepare_member, prepare_tasks) and self.run_tasks(pool, self.finish_member, finish_tasks)
+                if success:
+                    success = self.run_tasks(pool, self.extract_block, block_tasks) and self.run_tasks(pool, self.extract_member, stream_tasks)
+                if success and remove:
+                    self.events.put(("phase", "remove"))
+                    success = self.run_tasks(pool, self.remove_file, [({"path": path},) for path in remove])
+                if success and verify:
+                    self.events.put(("phase", "verify_install"))
+                    success = self.run_tasks(pool, self.verify_installed_chunk, chunk_tasks)
+                if success:
+                    self.write_installed_manifest(members)
+                    self.journal.remove()
+
+            if self.cancelled.is_set():
+                self.events.put(("error", ("", "Installation cancelled")))
+                success = False
+
+        except Exception as e:
+            self.events.put(("error", ("", str(e))))
+            success = False
+
+        finally:
+            self.journal.close() # Kept after a failure, the next run resumes from it
+            if (self.reader is not None):
+                self.reader.close()
+
+        self.events.put(("done", success))
+        return success
+
+    def select_members(self, members):
+        """Payload members of the selected components"""
+        if (self.components is None):
+            return members
+        return [member for member in members if (member.get("component", DEFAULT_COMPONENT) in self.components)]
+
+    def can_verify(self, members) -> bool:
+        return self.verify and all(("chunks" in member) for member in members)
+
+    def find_resumable(self):
+        """Fraction already done of an interrupted install of the same payload in the install directory, None if there is none"""
+        if (not os.path.exists(self.journal.path)):
+            return None
+        try: reader = open_payload(self.payload_path)
+        except Exception:
+            return None
+        try:
+            members = self.select_members(reader.members)
+            resumed = self.load_journal(members, reader.block_size)
+            if (resumed is None):
+                return None
+            write, remove, done = resumed
+            verify = self.can_verify(members)
+            total_bytes = sum(member["size"] for member in write) * (3 if verify else 1)
+            done_bytes, done_files = self.get_done_work(write, done, verify, reader.block_size)
+            return (done_bytes / total_bytes) if total_bytes else 0.0
+        finally:
+            reader.close()
+
+    def get_plan_key(self, members, block_size):
+        """Identity of the members to install, a journal only resumes an install of the same files"""
+        identity = [(member["path"], member["size"], member.get("sha256") or member["mtime"]) for member in members]
+        return hashlib.sha256(json.dumps([block_size, identity]).encode('utf-8')).hexdigest()
+
+    def load_journal(self, members, block_size):
+        """Plan and work done of the interrupted install recorded in the journal: (write, remove, done) or None.
+        done: member path -> {"p": verified payload blocks, "b": written blocks, "f": finished, "v": verified installed chunks}"""
+        journal = InstallJournal.read(self.journal.path)
+        if (journal is None):
+            return None
+        header, records = journal
+        if (header.get("plan")!=self.get_plan_key(members, block_size)):
+            return None
+        by_path = {member["path"]: member for member in members}
+        write = [by_path[path] for path in header["write"] if (path in by_path)]
+        done = {member["path"]: new_member_state() for member in write}
+        removed = set()
+        for record in records:
+            kind, path = record[0], record[1]
+            if (kind=="r"):
+                removed.add(path)
+            elif (path in done):
+                match kind:
+                    case "p" | "b" | "v":
+                        done[path][kind].add(record[2])
+                    case "f":
+                        done[path]["f"] = True
+                    case "x": # Failed its verification, written again
+                        done[path] = new_member_state()
+
+        # Files touched or removed since the interruption are written again
+        for member in write:
+            state = done[member["path"]]
+            if (not state["b"]) and (not state["f"]):
+                continue
+            try: stat = os.stat(self.get_target_path(member["path"]))
+            except OSError:
+                stat = None
+            if (stat is None) or (stat.st_size!=member["size"]) or (state["f"] and (abs(stat.st_mtime - member["mtime"]) >= 2)):
+                done[member["path"]] = new_member_state()
+        return write, [path for path in header["remove"] if (path not in removed)], done
+
+    def get_done_work(self, write, done, verify, block_size):
+        """(bytes of progress, files) already done according to the journal, counted like the workers count them"""
+        done_bytes, done_files = 0, 0
+        for member in write:
+            state = done[member["path"]]
+            length = lambda idx: min(block_size, member["size"] - idx * block_size)
+            if ("blocks" in member):
+                done_bytes += sum(length(idx) for idx in state["b"])
+            elif state["f"]:
+                done_bytes += member["size"]
+            if verify:
+                done_bytes += sum(length(idx) for idx in (state["p"] | state["b"])) + sum(length(idx) for idx in state["v"])
+            done_files += state["f"]
+        return done_bytes, done_files
+
+    def run_tasks(self, pool, func, tasks) -> bool:
+        """Run func(*task) for every task on the pool, posting an error event per failed task, commits the journal meanwhile"""
+        futures = {pool.submit(func, *task): task for task in tasks}
+        pending, success = set(futures), True
+        while pending:
+            # Wake up when a commit is due even if no task completed, a long file must not hold back the records of the others
+            completed, pending = wait(pending, timeout=self.journal.get_commit_delay(), return_when=FIRST_COMPLETED)
+            self.journal.commit_if_due()
+            for future in completed:
+                try: future.result()
+                except Exception as e:
+                    success = False
+                    if isinstance(e, IntegrityError):
+                        self.aborted.set()
+                    self.events.put(("error", (futures[future][0]["path"], str(e))))
+        return success and (not self.stopping())
+
+    def read_installed_manifest(self):
+        """Manifest of a previous install in the install directory, path -> entry, empty if none"""
+        path = os.path.join(self.install_dir, MANIFEST_FILENAME)
+        if (not os.path.exists(path)):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return {entry["path"]: entry for entry in json.load(f)["members"]}
+        except Exception as e:
+            print(f"[WARNING]: Ignoring unreadable install manifest '{path}': {e}")
+            return {}
+
+    def write_installed_manifest(self, members):
+        path = os.path.join(self.install_dir, MANIFEST_FILENAME)
+        entries = [{key: member.get(key) for key in ("path", "size", "mtime", "sha256")} for member in members]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "members": entries}, f, separators=(',', ':'))
+        return None
+
+    def remove_installed_manifest(self):
+        path = os.path.join(self.install_dir, MANIFEST_FILENAME)
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+
+    def plan_upgrade(self, members):
+        """Return (members to write, members already installed, installed paths to remove)"""
+        previous = self.read_installed_manifest()
+        write, unchanged = [], []
+        for member in members:
+            entry = previous.get(member["path"])
+            if (entry is not None) and self.is_unchanged(member, entry):
+                unchanged.append(member)
+            else:
+                write.append(member)
+        paths = {member["path"] for member in members}
+        remove = [path for path in previous if (path not in paths)]
+        return write, unchanged, remove
+
+    def get_required_space(self, members=None) -> int:
+        """Bytes the install adds to the install directory: the new size of each file to write minus the size of the file it replaces.
+        members are every member of the payload, read from it when None"""
+        if (members is None):
+            reader = open_payload(self.payload_path)
+            try: members = reader.members
+            finally:
+                reader.close()
+        write, unchanged, remove = self.plan_upgrade(self.select_members(members))
+        required = 0
+        for member in write:
+            try: old_size = os.path.getsize(self.get_target_path(member["path"]))
+            except OSError:
+                old_size = 0
+            # Files are replaced one by one and removed files go last, a shrinking file frees nothing the others can count on
+            required += max(0, member["size"] - old_size)
+        return required
+
+    def is_unchanged(self, member, entry) -> bool:
+        """Compare a payload member with its previous manifest entry, and with the file actually on disk"""
+        if (member["size"]!=entry.get("size")):
+            return False
+        if (member.get("sha256") is not None):
+            if (member["sha256"]!=entry.get("sha256")):
+                return False
+        elif (member["mtime"]!=entry.get("mtime")): # Zip payloads have no hashes
+            return False
+        try: stat = os.stat(self.get_target_path(member["path"]))
+        except OSError:
+            return False
+        # Installed files carry their packed mtime, a different one means the file was touched since
+        return (stat.st_size==entry["size"]) and (abs(stat.st_mtime - entry["mtime"]) < 2) # FAT has a 2s mtime resolution
+
+    def get_target_path(self, member_path):
+        """Destination of an archive member, refusing paths escaping the install directory"""
+        target = os.path.abspath(os.path.join(self.install_dir, member_path))
+        if (os.path.commonpath([target, self.install_dir])!=self.install_dir):
+            raise ValueError(f"Unsafe path in payload '{member_path}'")
+        return target
+
+    def prepare_member(self, member):
+        """Worker: create the destination file at its final size, its blocks are then written in any order"""
+        target = self.get_target_path(member["path"])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as dst:
+            dst.truncate(member["size"])
+        return None
+
+    def extract_block(self, member, idx):
+        """Worker: decompress one block and write it at its offset in the destination file"""
+        if self.stopping():
+            return None
+        codec = member["blocks"][idx][2]
+        with self.reader.read_block(member, idx) as packed:
+            data = packed if (codec=="store") else decompress_block(packed, codec) # Stored blocks go straight from the mmap to disk
+            target = self.get_target_path(member["path"])
+            with open(target, 'r+b') as dst:
+                dst.seek(idx * self.reader.block_size)
+                dst.write(data)
+            self.progress.add(len(data), 0)
+            self.journal.record(["b", member["path"], idx], target)
+
+        # Last block of the member written
+        with self.lock:
+            self.pending_blocks[member["path"]] -= 1
+            finished = (self.pending_blocks[member["path"]]==0)
+        if finished:
+            self.finish_member(member)
+        return None
+
+    def finish_member(self, member):
+        # Keep the packed modification time, lets a later install compare files cheaply
+        target = self.get_target_path(member["path"])
+        os.utime(target, (member["mtime"], member["mtime"]))
+        self.progress.add(0, 1)
+        self.journal.record(["f", member["path"]], target)
+        return None
+
+    def extract_member(self, member):
+        """Worker: stream one payload member to disk, posting progress per chunk"""
+        if self.stopping():
+            return None
+        target = self.get_target_path(member["path"])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        with open(target, 'wb') as dst:
+            for chunk in self.reader.iter_chunks(member, CHUNK_SIZE):
+                if self.stopping():
+                    return None
+                dst.write(chunk)
+                self.progress.add(len(chunk), 0)
+
+        self.finish_member(member)
+        return None
+
+    def remove_file(self, member):
+        """Worker: remove an installed file that is not part of the payload anymore, and its emptied directories"""
+        target = self.get_target_path(member["path"])
+        if os.path.isfile(target):
+            os.remove(target)
+        parent = os.path.dirname(target)
+        while (parent!=self.install_dir):
+            try: os.rmdir(parent) # Only succeeds on empty directories
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+        self.journal.record(["r", member["path"]])
+        return None
+
+    def verify_payload_block(self, member, idx):
+        """Worker: check one compressed payload block against its sha256, before anything is written"""
+        if self.stopping():
+            return None
+        offset, size, codec, block_sha256 = member["blocks"][idx]
+        with self.reader.read_block(member, idx) as packed:
+            if (hashlib.sha256(packed).hexdigest()!=block_sha256):
+                raise IntegrityError(f"Payload is corrupted (block {idx})")
+        # Progress is counted in uncompressed bytes, like the other phases
+        self.progress.add(min(self.reader.block_size, member["size"] - idx * self.reader.block_size), 0)
+        self.journal.record(["p", member["path"], idx])
+        return None
+
+    def verify_installed_chunk(self, member, idx):
+        """Worker: check one chunk of an installed file against the sha256 manifest"""
+        if self.stopping():
+            return None
+        target = self.get_target_path(member["path"])
+        if (idx==0) and (os.path.getsize(target)!=member["size"]):
+            self.journal.record(["x", member["path"]]) # Written again by the next run
+            raise IntegrityError("Installed file has the wrong size")
+        with open(target, 'rb') as f:
+            f.seek(idx * self.reader.block_size)
+            chunk = f.read(self.reader.block_size)
+        if (hashlib.sha256(chunk).hexdigest()!=member["chunks"][idx]):
+            self.journal.record(["x", member["path"]])
+            raise IntegrityError(f"Installed file is corrupted (chunk {idx})")
+        self.progress.add(len(chunk), 0)
+        self.journal.record(["v", member["path"], idx])
+        return None
@@ -1,13 +1,20 @@
 
-import os
-import sys
-import time
-from PIL import Image as pillowImage
-from PIL import ImageTk as pillowImageTk
-import tkinter as tk
-from tkinter import ttk
-from tkinter import filedialog
-import sv_ttk #tk theme: https://github.com/rdbende/Sun-Valley-ttk-theme/tree/main
+import tracing #first, so the startup trace covers the imports below (PYWIZ_TRACE=1)
+from tracing import span
+with span("import stdlib"):
+    import os
+    import sys
+    import time
+    import json
+    import hashlib
+    import queue
+    import shutil
+    import tempfile
+    import threading
+    from concurrent.futures import ThreadPoolExecutor, Future
+with span("import install_engine"):
+    from install_engine import InstallEngine, format_progress
+    from payload import locate_payload, open_payload
 
 APP_TITLE = "Geo-Scatter Installer"
 APP_SIZE = "720x880"  # Increased height to accommodate 700px header images + content
@@ -21,177 +28,587 @@ def get_assets_dir():
 
 ASSETS_DIR = get_assets_dir()
 ICON_PATH = os.path.join(ASSETS_DIR, 'app.ico')
+LICENSE_PATH = os.path.join(ASSETS_DIR, 'license.txt')
+BAKED_DIR = os.path.join(ASSETS_DIR, 'baked') #images pre-resized by the build scripts, png (or jpeg when Pillow is bundled), see build_utils.bake_assets()
 
-def set_window_icon(window):
-    """Set the window icon if available"""
-    if os.path.exists(ICON_PATH):
-        try: window.iconbitmap(ICON_PATH)
-        except Exception as e:
-            print(f"[ERROR]: set_window_icon(): Could not set window icon: {e}")
-    else:   print(f"[ERROR]: set_window_icon(): Icon file not found '{ICON_PATH}'")
-    return None
+EXTRACTION_MARKER = os.path.join(ASSETS_DIR, 'extraction_cache.json') #written by the build when the onefile unpacks in a persistent cache
+EXTRACTION_LOCK_PREFIX = '.pywiz_running_' #+pid, one per running installer in its extraction folder, locked until the process exits
+EXTRACTIONLOCK = None #lock file of this process, kept open so no other installer removes our extraction while we run
 
-def pop_warning_near_mouse(parent, title="Warning", message="Oh no!", geometry="320x220"):
-    """Show a custom warning dialog near the mouse cursor"""
-    # Get mouse position first
-    x = parent.winfo_pointerx()
-    y = parent.winfo_pointery()
-    x -= 150 # Center the dialog better
-    y -= 150
-
-    # Create dialog but hide it initially
-    dialog = tk.Toplevel(parent)
-    dialog.withdraw()  # Hide the window initially
-    dialog.title(title)
-    dialog.resizable(False, False)
-    dialog.configure(bg="#1c1c1c")
-
-    sv_ttk.set_theme("dark") # Apply theme
-    set_window_icon(dialog)
-
-    # Content frame
-    content = tk.Frame(dialog, bg="#1c1c1c")
-    content.pack(fill="both", expand=True, padx=10, pady=10)
-
-    # Icon + Message
-    tk.Label(content, text="⚠️", font=("Segoe UI", 20), bg="#1c1c1c", fg="orange").pack(pady=(0, 10))
-    tk.Label(content, text=message, font=("Segoe UI", 10), bg="#1c1c1c", fg="white",
-            wraplength=300, justify="left").pack(pady=(0, 20))
-
-    # OK button
-    ttk.Button(content, text="OK", command=dialog.destroy, takefocus=0).pack()
-
-    # Force the dialog to calculate its size and set fixed geometry
-    dialog.update_idletasks()  # Force geometry calculation
-    dialog.geometry(f"{geometry}+{x}+{y}")  # Fixed size + position
-
-    # Make modal and show
-    dialog.transient(parent)
-    dialog.grab_set()
-    dialog.deiconify()  # Show the window at the correct position and size
-    parent.wait_window(dialog)
+def lock_file(f) -> bool:
+    """Lock an open file exclusively without blocking, False if another process holds it, released when the file is closed"""
+    try:
+        f.seek(0) # msvcrt locks from the current position, every process locks the first byte
+        if (os.name=="nt"):
+            import msvcrt
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+def get_extraction_parent():
+    """Folder holding the cached extractions of every build, None in development or when not unpacked in the cache"""
+    if (not os.path.exists(EXTRACTION_MARKER)):
+        return None
+    try:
+        with open(EXTRACTION_MARKER, 'r', encoding='utf-8') as f:
+            root = json.load(f)["root"]
+    except Exception as e:
+        print(f"[WARNING]: get_extraction_parent(): Could not read '{EXTRACTION_MARKER}': {e}")
+        return None
 
+    # Only ever clean inside our own cache folder: {CACHE_DIR}/root/<bundle hash>/assets
+    parent = os.path.dirname(os.path.dirname(ASSETS_DIR))
+    if (not parent.replace(os.sep, '/').endswith('/' + root)):
+        return None # Development, or not unpacked in the cache
+    return parent
+
+def hold_extraction_lock():
+    """Lock a file in our extraction folder until the process exits, call it first thing at startup"""
+    global EXTRACTIONLOCK
+    if (EXTRACTIONLOCK is not None) or (get_extraction_parent() is None):
+        return None
+    path = os.path.join(os.path.dirname(ASSETS_DIR), f"{EXTRACTION_LOCK_PREFIX}{os.getpid()}")
+    try: f = open(path, 'a+b')
+    except OSError as e:
+        print(f"[WARNING]: Could not create the extraction lock '{path}': {e}")
+        return None
+    if lock_file(f):
+        EXTRACTIONLOCK = f
+    else:
+        f.close()
     return None
 
-def pop_confirmation_dialog(parent, title="Confirm", message="Are you sure?", confirm_text="Yes", cancel_text="No", geometry="320x240"):
-    """Show a confirmation dialog with Yes/No buttons"""
-    # Get mouse position for dialog placement
-    x = parent.winfo_pointerx()
-    y = parent.winfo_pointery()
-    x -= 100  # Center the dialog better
-    y -= 50
+def is_extraction_stale(path) -> bool:
+    """An extraction is stale once every installer that ran from it exited, folders without any lock are never proven stale"""
+    locks = [name for name in os.listdir(path) if name.startswith(EXTRACTION_LOCK_PREFIX)]
+    if (not locks):
+        return False # Still being unpacked, or unpacked by a build that doesn't lock
+    for name in locks:
+        try:
+            with open(os.path.join(path, name), 'a+b') as f:
+                if (not lock_file(f)):
+                    return False # Running
+        except OSError:
+            return False
+    return True
+
+def cleanup_extraction_cache():
+    """Remove the cached extractions of previous builds and versions no installer runs from, the current one is kept for the next launches"""
+    parent = get_extraction_parent()
+    if (parent is None):
+        return None
+    current = os.path.dirname(ASSETS_DIR)
+    for name in os.listdir(parent):
+        path = os.path.join(parent, name)
+        if (path==current) or (not os.path.isdir(path)):
+            continue
+        try: stale = is_extraction_stale(path)
+        except OSError:
+            stale = False
+        if (not stale):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        if (not os.path.exists(path)):
+            print(f"[INFO]: Removed stale extraction cache '{path}'")
+
+    # Lock files left in our own folder by installers that exited
+    own = f"{EXTRACTION_LOCK_PREFIX}{os.getpid()}"
+    for name in os.listdir(current):
+        if name.startswith(EXTRACTION_LOCK_PREFIX) and (name!=own):
+            try:
+                with open(os.path.join(current, name), 'a+b') as f:
+                    stale = lock_file(f)
+                if stale:
+                    os.remove(os.path.join(current, name))
+            except OSError:
+                pass # Locked or removed meanwhile
+    return None
 
-    # Create dialog but hide it initially
-    dialog = tk.Toplevel(parent)
-    dialog.withdraw()
-    dialog.title(title)
-    dialog.resizable(False, False)
-    dialog.configure(bg="#1c1c1c")
+PATHCHECK_TTL = 5.0 #seconds a validation result is reused
+DISKUSAGECACHE = {} #volume -> (time checked, free bytes), shared by every path of the same volume
+MIN_FREE_SPACE = 64 * 1024 * 1024 #bytes kept free on the target volume on top of the installed files
+PAYLOADMEMBERS = None #(payload path, members of its index), the index is read once for every free space check
+
+# Payload components installed by each installation type of Page2, None installs every component.
+# A component is a top level folder of the payload, files at its root belong to payload.DEFAULT_COMPONENT,
+# ex: "Standard": ("core", "docs") to leave 'payload/samples/' to the complete installation
+INSTALL_TYPE_COMPONENTS = {
+    "Standard": None,
+    "Complete": None,
+    "Custom": None, # No component picker yet
+    }
+
+def format_size(num_bytes):
+    """'1.2 GB' or '340 MB'"""
+    if (num_bytes >= 1024**3):
+        return f"{num_bytes / 1024**3:.1f} GB"
+    return f"{num_bytes / 1024**2:.0f} MB"
+
+def load_payload_members(payload_path):
+    """Read the payload index once, its members are shared by every free space check"""
+    global PAYLOADMEMBERS
+    reader = open_payload(payload_path)
+    try: PAYLOADMEMBERS = (payload_path, reader.members)
+    finally:
+        reader.close()
+    return None
 
-    sv_ttk.set_theme("dark") # Apply theme
-    set_window_icon(dialog)
+def get_required_space(install_dir, installation_type):
+    """Bytes an install of the given installation type adds to install_dir, an upgrade only counts what it writes over the installed files"""
+    global PAYLOADMEMBERS
+    if (PAYLOADMEMBERS is None):
+        try: load_payload_members(locate_payload(ASSETS_DIR))
+        except Exception as e:
+            print(f"[WARNING]: get_required_space(): Could not read the payload index: {e}")
+            PAYLOADMEMBERS = (None, [])
+    payload_path, members = PAYLOADMEMBERS
+    engine = InstallEngine(payload_path, install_dir, components=INSTALL_TYPE_COMPONENTS.get(installation_type))
+    return engine.get_required_space(members)
+
+def get_volume(path):
+    """Drive, share or mount point holding the given path"""
+    path = os.path.abspath(path)
+    drive = os.path.splitdrive(path)[0]
+    if drive:
+        return drive
+    while (not os.path.ismount(path)):
+        parent = os.path.dirname(path)
+        if (parent==path):
+            break
+        path = parent
+    return path
+
+def get_free_space(path):
+    """Free bytes on the volume of the given path, cached per volume"""
+    volume = get_volume(path)
+    cached = DISKUSAGECACHE.get(volume)
+    if (cached is not None) and (time.monotonic() - cached[0] < PATHCHECK_TTL):
+        return cached[1]
+    free_bytes = shutil.disk_usage(path).free
+    DISKUSAGECACHE[volume] = (time.monotonic(), free_bytes)
+    return free_bytes
+
+def check_install_dir(path, installation_type=None):
+    """Validate an install directory, may block on unreachable drives so never call it on the Tk main thread.
+    Return (valid, message, free_bytes)"""
+    if (not path):
+        return False, "No directory selected", None
+    if (not os.path.isdir(path)):
+        if os.path.exists(path):
+            return False, "Path is a file, not a directory", None
+        return False, "Directory does not exist", None
+
+    # os.access() is unreliable on Windows, really try to create a file
+    try:
+        with tempfile.TemporaryFile(dir=path):
+            pass
+    except OSError:
+        return False, "Directory is not writable", None
+
+    try: free_bytes = get_free_space(path)
+    except OSError as e:
+        return False, f"Could not read free space: {e}", None
+
+    # Refuse up front rather than running out of space halfway through the extraction
+    required = get_required_space(path, installation_type)
+    if (free_bytes < required + MIN_FREE_SPACE):
+        return False, f"Not enough free space ({format_size(required)} required, {format_size(free_bytes)} available)", free_bytes
+    return True, f"{format_size(required)} required, {format_size(free_bytes)} available", free_bytes
+
+#NOTE: silent install, everything above the tkinter import is shared with the wizard and must not need Tk,
+#      'installer.exe --silent --accept-license --install-dir "D:/Apps/GeoScatter"', or '--silent --answers answers.json'
+
+SILENT_DEFAULTS = { #wizard answers and their defaults, same keys as USERSTORAGE, also the keys of an answer file
+    "license1_accepted": False,
+    "bool_option1": True,
+    "enum_choice": "Standard",
+    "float_value": 50.0,
+    "int_value": 10,
+    "install_dir": "",
+    }
+SILENT_PROGRESS_S = 1.0 #seconds between two progress lines
+SILENT_PHASES = {
+    "verify_payload": "Verifying payload integrity...",
+    "extract": "Installing files...",
+    "remove": "Removing obsolete files...",
+    "verify_install": "Verifying installed files...",
+    }
+
+def parse_silent_args(argv):
+    """Wizard answers from an optional json answer file, overridden by the command line, return (answers, payload_path, restart)"""
+    import argparse # Only the silent install parses arguments
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), description=f"{APP_TITLE}, silent installation without user interface")
+    parser.add_argument("--silent", action="store_true", help="install without user interface, required")
+    parser.add_argument("--answers", metavar="JSON", help=f"answer file, a json object with the keys: {', '.join(SILENT_DEFAULTS)}")
+    parser.add_argument("--accept-license", dest="license1_accepted", action="store_const", const=True, help="accept the license")
+    parser.add_argument("--install-dir", dest="install_dir", help="install directory, created if missing")
+    parser.add_argument("--type", dest="enum_choice", choices=list(INSTALL_TYPE_COMPONENTS), help="installation type")
+    parser.add_argument("--desktop-shortcut", dest="bool_option1", action=argparse.BooleanOptionalAction, help="create a desktop shortcut")
+    parser.add_argument("--memory", dest="float_value", type=float, help="memory allocation in GB, 0 to 100")
+    parser.add_argument("--threads", dest="int_value", type=int, help="thread count, 1 to 32")
+    parser.add_argument("--payload", help="payload file, the one shipped with the installer by default")
+    parser.add_argument("--restart", action="store_true", help="start over instead of resuming an interrupted installation")
+    args = parser.parse_args(argv)
+
+    answers = dict(SILENT_DEFAULTS)
+    if args.answers:
+        try:
+            with open(args.answers, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"could not read the answer file '{args.answers}': {e}")
+        if (not isinstance(loaded, dict)):
+            parser.error(f"the answer file '{args.answers}' must contain a json object")
+        unknown = sorted(set(loaded) - set(SILENT_DEFAULTS))
+        if unknown:
+            parser.error(f"unknown keys in the answer file: {', '.join(unknown)}")
+        answers.update(loaded)
+    answers.update({key: value for key, value in vars(args).items() if (key in SILENT_DEFAULTS) and (value is not None)})
+
+    # Same types, choices and ranges as the widgets of the wizard
+    for key, default in SILENT_DEFAULTS.items():
+        expected = (int, float) if isinstance(default, float) else type(default)
+        if (not isinstance(answers[key], expected)) or (isinstance(answers[key], bool) and (not isinstance(default, bool))):
+            parser.error(f"'{key}' must be of type {type(default).__name__}, got {answers[key]!r}")
+    if (answers["enum_choice"] not in INSTALL_TYPE_COMPONENTS):
+        parser.error(f"'enum_choice' must be one of {', '.join(INSTALL_TYPE_COMPONENTS)}, got '{answers['enum_choice']}'")
+    if not (0 <= answers["float_value"] <= 100):
+        parser.error(f"'float_value' must be between 0 and 100, got {answers['float_value']}")
+    if not (1 <= answers["int_value"] <= 32):
+        parser.error(f"'int_value' must be between 1 and 32, got {answers['int_value']}")
+    if (answers["license1_accepted"]!=True):
+        parser.error(f"the license must be accepted with --accept-license or \"license1_accepted\": true, see '{LICENSE_PATH}'")
+    if (not answers["install_dir"]):
+        parser.error("an install directory is required, --install-dir")
+    return answers, args.payload, args.restart
+
+def run_silent_install(argv):
+    """Install without user interface, progress printed to the console, return the process exit code"""
+    hold_extraction_lock()
+    # A build with --splash shows the bootloader splash until Python closes it, pyi_splash talks to the bootloader without Tk
+    try:
+        import pyi_splash
+        pyi_splash.close()
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"[WARNING]: Could not close the splash screen: {e}")
+    answers, payload_path, restart = parse_silent_args(argv)
+    install_dir = os.path.abspath(answers["install_dir"])
+    print("[CONFIG] Desktop shortcut:", answers['bool_option1'])
+    print(f"[CONFIG] Installation Type: {answers['enum_choice']}")
+    print(f"[CONFIG] Memory Allocation: {answers['float_value']:.1f} GB")
+    print(f"[CONFIG] Thread Count: {answers['int_value']}")
+    print(f"[CONFIG] Install Directory: {install_dir}")
+
+    payload_path = payload_path or locate_payload(ASSETS_DIR) # Appended to the executable, or shipped in the assets
+    if (payload_path is None):
+        print("[ERROR]: No payload found, neither appended to the installer nor in its assets")
+        return 1
+    try: load_payload_members(payload_path) # Sizes for the free space check
+    except Exception as e:
+        print(f"[ERROR]: Could not read the payload '{payload_path}': {e}")
+        return 1
+
+    # Same checks as Page4, except that a missing directory is created
+    try: os.makedirs(install_dir, exist_ok=True)
+    except OSError as e:
+        print(f"[ERROR]: Could not create the install directory '{install_dir}': {e}")
+        return 1
+    valid, message, free_bytes = check_install_dir(install_dir, answers["enum_choice"])
+    if (not valid):
+        print(f"[ERROR]: Install directory '{install_dir}': {message}")
+        return 1
+    print(f"[INFO]: {message}")
+
+    # Same install as Page3, events are awaited instead of polled at a frame rate
+    components = INSTALL_TYPE_COMPONENTS.get(answers["enum_choice"])
+    engine = InstallEngine(payload_path, install_dir, workers=answers["int_value"], components=components, resume=(not restart))
+    engine.start()
+    done, errors, unchanged, total_bytes, last_print = None, [], 0, 0, time.perf_counter()
+    try:
+        while (done is None):
+            try: events = [engine.events.get(timeout=SILENT_PROGRESS_S)] + engine.drain_events()
+            except queue.Empty:
+                events = []
+            for kind, data in events:
+                match kind:
+                    case "plan":
+                        unchanged = data[1] # Files kept from a previous install
+                    case "start":
+                        total_bytes = data[0]
+                    case "resume":
+                        print(f"[INSTALL]: Resuming an interrupted installation, {data[0] / max(total_bytes, 1):.0%} already done", flush=True)
+                    case "phase":
+                        print(f"[INSTALL]: {SILENT_PHASES.get(data, data)}", flush=True)
+                    case "error":
+                        print(f"[ERROR]: Install: {data[0]}: {data[1]}")
+                        errors.append(data)
+                    case "done":
+                        done = data
+            done_bytes, total_bytes, done_files, total_files, rate, eta = engine.progress.snapshot()
+            if (done is None) and (total_bytes > 0) and (time.perf_counter() - last_print >= SILENT_PROGRESS_S):
+                last_print = time.perf_counter()
+                print(f"[INSTALL]: {100 * done_bytes / total_bytes:5.1f}%  {done_files}/{total_files} files  {format_progress(rate, eta)}", flush=True)
+    except KeyboardInterrupt:
+        print("[WARNING]: Installation cancelled")
+        engine.cancel()
+        engine.thread.join()
+        return 1
+
+    cleanup_extraction_cache()
+    if (done==False):
+        print(f"[ERROR]: Installation failed: {errors[0][1] if errors else 'Unknown error'}")
+        return 1
+    unchanged = f", {unchanged} already up to date" if unchanged else ""
+    print(f"[SUCCESS] Installation complete! {done_files} files installed{unchanged}")
+    return 0
+
+# Dispatch before Tk, sv_ttk or Pillow are imported, a silent install starts in milliseconds and needs no display
+if (__name__ == "__main__") and ("--silent" in sys.argv[1:]):
+    sys.exit(run_silent_install(sys.argv[1:]))
+
+with span("import tkinter"):
+    import tkinter as tk
+    from tkinter import ttk
+    from tkinter import filedialog
+with span("import sv_ttk"):
+    import sv_ttk #tk theme: https://github.com/rdbende/Sun-Valley-ttk-theme/tree/main
+
+def submit_daemon(func, *args, name="pywiz_worker"):
+    """Run func(*args) in a daemon thread and return its Future, for calls that may block and must never hold the process exit"""
+    future = Future()
+    def worker():
+        if (not future.set_running_or_notify_cancel()): # Cancelled before it started
+            return None
+        try: future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return None
+    threading.Thread(target=worker, name=name, daemon=True).start()
+    return future
 
-    # Content frame
-    content = tk.Frame(dialog, bg="#1c1c1c")
-    content.pack(fill="both", expand=True, padx=20, pady=20)
+def import_pillow():
+    """Import Pillow lazily, only needed when an asset was not baked into a format Tk loads natively"""
+    from PIL import Image as pillowImage
+    from PIL import ImageTk as pillowImageTk
+    return pillowImage, pillowImageTk
 
-    # Icon + Message
-    tk.Label(content, text="❓", font=("Segoe UI", 24), bg="#1c1c1c", fg="orange").pack(pady=(0, 10))
-    tk.Label(content, text=message, font=("Segoe UI", 11), bg="#1c1c1c", fg="white", wraplength=300, justify="center").pack(pady=(0, 20))
+def set_window_icon(window):
+    """Set the window icon if available"""
+    # Windows loads the .ico natively, other platforms use the baked png through a PhotoImage
+    if (sys.platform=="win32") and os.path.exists(ICON_PATH):
+        try: window.iconbitmap(ICON_PATH)
+        except Exception as e:
+            print(f"[ERROR]: set_window_icon(): Could not set window icon: {e}")
+        return None
+    icon_path = get_baked_asset_path("icon", ICON_PATH)
+    if (icon_path is not None):
+        try:
+            if ("icon" not in IMAGECACHE):
+                IMAGECACHE["icon"] = tk.PhotoImage(file=icon_path)
+            window.iconphoto(False, IMAGECACHE["icon"])
+        except Exception as e:
+            print(f"[ERROR]: set_window_icon(): Could not set window icon: {e}")
+    else:   print(f"[ERROR]: set_window_icon(): Baked icon not found for '{ICON_PATH}'")
+    return None
 
-    # Button frame
-    button_frame = tk.Frame(content, bg="#1c1c1c")
-    button_frame.pack()
+DIALOGPOOL = {} #(parent, kind) -> hidden PooledDialog reused by the pop_* helpers
 
-    # Result variable
-    result = tk.BooleanVar(value=False)
+# Dialog kinds: icon, icon font size, icon color, message font size, message justify, padding, button results in display order
+DIALOG_KINDS = {
+    "warning": ("⚠️", 20, "orange", 10, "left", 10, (True,)),
+    "confirmation": ("❓", 24, "orange", 11, "center", 20, (False, True)),
+    "success": ("✅", 20, "green", 10, "left", 10, (True,)),
+    }
 
-    def on_confirm():
-        result.set(True)
-        dialog.destroy()
-        return None
-    def on_cancel():
-        result.set(False)
-        dialog.destroy()
-        return None
+class PooledDialog(tk.Toplevel):
+    """Modal dialog built once per kind, hidden between uses and only updated with the new text and geometry"""
 
-    # Buttons
-    ttk.Button(button_frame, text=cancel_text, command=on_cancel, takefocus=0).pack(side="left", padx=(0, 10))
-    ttk.Button(button_frame, text=confirm_text, command=on_confirm, takefocus=0).pack(side="left")
+    def __init__(self, parent, kind):
+        super().__init__(parent)
+        icon, icon_size, icon_color, message_size, justify, padding, results = DIALOG_KINDS[kind]
+        self.withdraw()  # Hide the window until shown
+        self.resizable(False, False)
+        self.configure(bg="#1c1c1c")
+        self.transient(parent)
+        self.protocol("WM_DELETE_WINDOW", lambda: self.close(False))
+        set_window_icon(self) # The theme is already applied to the whole application by the Wizard
+        self.parent = parent
+        self.result = False
+        self.closed = tk.BooleanVar(value=True)
+
+        # Content frame
+        content = tk.Frame(self, bg="#1c1c1c")
+        content.pack(fill="both", expand=True, padx=padding, pady=padding)
+
+        # Icon + Message
+        tk.Label(content, text=icon, font=("Segoe UI", icon_size), bg="#1c1c1c", fg=icon_color).pack(pady=(0, 10))
+        self.message_label = tk.Label(content, text="", font=("Segoe UI", message_size), bg="#1c1c1c", fg="white",
+                                      wraplength=300, justify=justify)
+        self.message_label.pack(pady=(0, 20))
+
+        # Buttons, their text is set on every show
+        button_frame = tk.Frame(content, bg="#1c1c1c")
+        button_frame.pack()
+        self.buttons = []
+        for i, result in enumerate(results):
+            button = ttk.Button(button_frame, command=lambda r=result: self.close(r), takefocus=0)
+            button.pack(side="left", padx=((0, 10) if (i < len(results) - 1) else 0))
+            self.buttons.append(button)
+
+        self.update_idletasks() # Lay the widgets out now, not when the user is waiting for the dialog
+
+    def show(self, title, message, geometry, offset, button_texts) -> bool:
+        """Show the dialog near the mouse and wait until it is closed, return the result of the clicked button"""
+        # Get mouse position first
+        x = self.parent.winfo_pointerx() - offset[0]
+        y = self.parent.winfo_pointery() - offset[1]
+
+        self.title(title)
+        self.message_label.config(text=message)
+        for button, text in zip(self.buttons, button_texts):
+            button.config(text=text)
+        self.geometry(f"{geometry}+{x}+{y}")  # Fixed size + position
+
+        # Make modal and show
+        self.result = False
+        self.closed.set(False)
+        self.deiconify()
+        self.grab_set()
+        self.wait_variable(self.closed)
+        return self.result
+
+    def close(self, result):
+        self.result = result
+        self.grab_release()
+        self.withdraw()
+        self.closed.set(True)
+        return None
 
-    # Force the dialog to calculate its size and set fixed geometry
-    dialog.update_idletasks()  # Force geometry calculation
-    dialog.geometry(f"{geometry}+{x}+{y}")  # Fixed size + position
+def get_dialog(parent, kind):
+    """Return the pooled dialog of the given kind for this parent, building it on first use"""
+    key = (str(parent), kind)
+    dialog = DIALOGPOOL.get(key)
+    if (dialog is None) or (not dialog.winfo_exists()):
+        dialog = DIALOGPOOL[key] = PooledDialog(parent, kind)
+    return dialog
+
+def prewarm_dialogs(parent):
+    """Build every dialog kind in advance, called when the wizard is idle"""
+    for kind in DIALOG_KINDS:
+        with span("prewarm dialog", kind=kind):
+            get_dialog(parent, kind)
+    return None
 
-    # Make modal and show
-    dialog.transient(parent)
-    dialog.grab_set()
-    dialog.deiconify()  # Show the window at the correct position and size
-    parent.wait_window(dialog)
+def close_splash(window=None, attempts=3):
+    """Close the PyInstaller bootloader splash screen if there is one, failed attempts are retried from the event loop"""
+    try: import pyi_splash
+    except ImportError:
+        print("[SPLASH] PyInstaller splash screen not available (not using --splash)")
+        return None
+    try:
+        with span("pyi_splash.close"):
+            pyi_splash.close()
+        print("[SPLASH] PyInstaller splash screen closed successfully")
+    except Exception as e:
+        print(f"[SPLASH] Error closing splash screen: {e}")
+        if (window is not None) and (attempts > 1):
+            window.after(100, close_splash, window, attempts - 1) # Never sleep, the window keeps responding
+    return None
 
-    return result.get()
+def pop_warning_near_mouse(parent, title="Warning", message="Oh no!", geometry="320x220"):
+    """Show a custom warning dialog near the mouse cursor"""
+    get_dialog(parent, "warning").show(title, message, geometry, (150, 150), ("OK",))
+    return None
 
+def pop_confirmation_dialog(parent, title="Confirm", message="Are you sure?", confirm_text="Yes", cancel_text="No", geometry="320x240"):
+    """Show a confirmation dialog with Yes/No buttons"""
+    return get_dialog(parent, "confirmation").show(title, message, geometry, (100, 50), (cancel_text, confirm_text))
 
 def pop_success_message(parent, title="Success!", message="Operation completed successfully.", geometry="320x200"):
     """Show a success dialog with green checkmark"""
-    # Get mouse position first
-    x = parent.winfo_pointerx()
-    y = parent.winfo_pointery()
-    x -= 150  # Center the dialog better
-    y -= 150
-
-    # Create dialog but hide it initially
-    dialog = tk.Toplevel(parent)
-    dialog.withdraw()  # Hide the window initially
-    dialog.title(title)
-    dialog.resizable(False, False)
-    dialog.configure(bg="#1c1c1c")
-
-    sv_ttk.set_theme("dark") # Apply theme
-    set_window_icon(dialog)
-
-    # Content frame
-    content = tk.Frame(dialog, bg="#1c1c1c")
-    content.pack(fill="both", expand=True, padx=10, pady=10)
-
-    # Icon + Message
-    tk.Label(content, text="✅", font=("Segoe UI", 20), bg="#1c1c1c", fg="green").pack(pady=(0, 10))
-    tk.Label(content, text=message, font=("Segoe UI", 10), bg="#1c1c1c", fg="white",
-            wraplength=300, justify="left").pack(pady=(0, 20))
-
-    # OK button
-    ttk.Button(content, text="OK", command=dialog.destroy, takefocus=0).pack()
-
-    # Force the dialog to calculate its size and set fixed geometry
-    dialog.update_idletasks()  # Force geometry calculation
-    dialog.geometry(f"{geometry}+{x}+{y}")  # Fixed size + position
-
-    # Make modal and show
-    dialog.transient(parent)
-    dialog.grab_set()
-    dialog.deiconify()  # Show the window at the correct position and size
-    parent.wait_window(dialog)
-
+    get_dialog(parent, "success").show(title, message, geometry, (150, 150), ("OK",))
     return None
 
 
 IMAGECACHE = {}
+IMAGEDECODER = None #worker threads decoding header images off the Tk main thread, created on first use
+IMAGEQUEUE = queue.Queue() #decoded header images waiting to become PhotoImages on the Tk main thread
+IMAGEWAITERS = {} #image_key -> callbacks waiting for the PhotoImage
+IMAGEPOLLING = False
+PLACEHOLDERCACHE = {}
+HEADER_WIDTH = 720 #header images are displayed at the full window width
+BAKED_MANIFEST = None
+
+def load_baked_manifest():
+    """Load the baked header images manifest once, empty dict if not available"""
+    global BAKED_MANIFEST
+    if (BAKED_MANIFEST is None):
+        manifest = {}
+        manifest_path = os.path.join(BAKED_DIR, 'manifest.json')
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except Exception as e:
+                print(f"[WARNING]: Could not read baked manifest: {e}")
+        BAKED_MANIFEST = manifest
+    return BAKED_MANIFEST
+
+def get_baked_asset_path(image_key, source_path):
+    """Return the path of the baked image if it exists and is not stale, otherwise None"""
+    manifest = load_baked_manifest()
+    if (manifest.get("width")!=HEADER_WIDTH):
+        return None
+    entry = manifest.get("images", {}).get(image_key)
+    if (entry is None):
+        return None
+    baked_path = os.path.join(BAKED_DIR, entry["file"])
+    if (not os.path.exists(baked_path)):
+        return None
 
-def load_header_image(page_number):
-    """Load header image for the specified page number"""
+    # Stale if the source image changed since the bake (source may be absent from the bundle, then trust the bake)
+    if os.path.exists(source_path):
+        if (os.path.getsize(source_path)!=entry.get("source_size")):
+            return None
+        with open(source_path, 'rb') as f:
+            if (hashlib.sha256(f.read()).hexdigest()!=entry.get("source_sha256")):
+                return None
+
+    return baked_path
+
+def decode_header_image(page_number):
+    """Read and decode the header image without touching Tk, safe to call from a worker thread"""
     image_key = f"page{page_number}"
-    if (image_key in IMAGECACHE):
-        return IMAGECACHE[image_key]
     image_path = os.path.join(ASSETS_DIR, f'header_{image_key}.jpg')
+
+    # Fast path: image already at its final size, png is decoded natively by Tk, jpeg by Pillow without resizing
+    baked_path = get_baked_asset_path(image_key, image_path)
+    if (baked_path is not None):
+        try:
+            if (load_baked_manifest()["images"][image_key].get("format")=="jpeg"):
+                pillowImage, _ = import_pillow()
+                image = pillowImage.open(baked_path)
+                image.load() # Decode here, in the worker thread
+                return ("pillow", image)
+            with open(baked_path, 'rb') as f:
+                return ("png", f.read())
+        except Exception as e:
+            print(f"[WARNING]: Could not read baked header image for {image_key}: {e}")
+
     if os.path.exists(image_path):
         try: 
+            pillowImage, _ = import_pillow() # Not baked, needs Pillow to decode and resize
             image = pillowImage.open(image_path) # Load and resize image to fit window width (720px) while maintaining aspect ratio
             aspect_ratio = image.height / image.width # Calculate new height to maintain aspect ratio for 720px width
-            new_height = int(720 * aspect_ratio)
-            image = image.resize((720, new_height), pillowImage.LANCZOS)
-            photo = pillowImageTk.PhotoImage(image)
-            IMAGECACHE[image_key] = photo
-            return photo
+            new_height = int(HEADER_WIDTH * aspect_ratio)
+            image = image.resize((HEADER_WIDTH, new_height), pillowImage.LANCZOS)
+            return ("pillow", image)
         except Exception as e:
             print(f"[WARNING]: Could not load header image for {image_key}: {e}")
             return None
@@ -199,6 +616,98 @@ def load_header_image(page_number):
         print(f"[WARNING]: Header image not found: {image_path}")
         return None
 
+def create_header_photo(image_key, decoded):
+    """Turn a decoded header image into a cached PhotoImage, must run on the Tk main thread"""
+    if (decoded is None):
+        return None
+    kind, data = decoded
+    try:
+        match kind:
+            case "png":
+                photo = tk.PhotoImage(data=data)
+            case "pillow":
+                _, pillowImageTk = import_pillow()
+                photo = pillowImageTk.PhotoImage(data)
+    except Exception as e:
+        print(f"[WARNING]: Could not create header image for {image_key}: {e}")
+        return None
+    IMAGECACHE[image_key] = photo
+    return photo
+
+def load_header_image(page_number):
+    """Load header image for the specified page number"""
+    image_key = f"page{page_number}"
+    if (image_key in IMAGECACHE):
+        return IMAGECACHE[image_key]
+    with span("load_header_image", page=page_number):
+        return create_header_photo(image_key, decode_header_image(page_number))
+
+def load_header_image_async(widget, page_number, callback):
+    """Decode the header image in a worker thread, callback(photo) is then called on the Tk main thread"""
+    global IMAGEDECODER, IMAGEPOLLING
+    image_key = f"page{page_number}"
+    if (image_key in IMAGECACHE):
+        callback(IMAGECACHE[image_key])
+        return None
+
+    # Only one decode per image, later requests wait on the same result
+    if (image_key in IMAGEWAITERS):
+        IMAGEWAITERS[image_key].append(callback)
+        return None
+    IMAGEWAITERS[image_key] = [callback]
+
+    if (IMAGEDECODER is None):
+        IMAGEDECODER = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pywiz_image")
+
+    def decode_worker():
+        try:
+            with span("decode_header_image", page=page_number):
+                decoded = decode_header_image(page_number)
+        except Exception as e:
+            print(f"[WARNING]: Could not decode header image for {image_key}: {e}")
+            decoded = None
+        IMAGEQUEUE.put((image_key, decoded)) # Always answer, the poll loop runs until every waiter is served
+        return None
+
+    IMAGEDECODER.submit(decode_worker)
+
+    if (not IMAGEPOLLING):
+        IMAGEPOLLING = True
+        root = widget.winfo_toplevel() # Poll from the window, individual widgets may be destroyed meanwhile
+        root.after(15, poll_decoded_images, root)
+    return None
+
+def poll_decoded_images(widget):
+    """Drain decoded header images on the Tk main thread, reschedule while decodes are pending"""
+    global IMAGEPOLLING
+    while True:
+        try: image_key, decoded = IMAGEQUEUE.get_nowait()
+        except queue.Empty:
+            break
+        with span("create_header_photo", image=image_key):
+            photo = create_header_photo(image_key, decoded)
+        for callback in IMAGEWAITERS.pop(image_key, []):
+            callback(photo)
+
+    if IMAGEWAITERS:
+        widget.after(15, poll_decoded_images, widget)
+    else:
+        IMAGEPOLLING = False
+    return None
+
+def get_header_placeholder(page_number):
+    """Blank image of the baked header size, reserves the header space until the real image is decoded"""
+    image_key = f"page{page_number}"
+    if (image_key in PLACEHOLDERCACHE):
+        return PLACEHOLDERCACHE[image_key]
+    placeholder = None
+    entry = load_baked_manifest().get("images", {}).get(image_key)
+    if (entry is not None):
+        width, height = entry["size"]
+        placeholder = tk.PhotoImage(width=width, height=height)
+    PLACEHOLDERCACHE[image_key] = placeholder
+    return placeholder
+
 
 # oooooooooo.                               
 # `888'   `Y8b                              
@@ -208,7 +717,42 @@ def load_header_image(page_number):
 #  888    .88P d8(  888  o.  )88b 888    .o 
 # o888bood8P'  `Y888""8o 8""888P' `Y8bod8P' 
 
-USERSTORAGE = {} # Global storage for user data across all pages
+class ObservableStore(dict):
+    """dict notifying subscribers of the keys whose value changed"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subscribers = [] #(callback, keys or None for every key)
+
+    def __setitem__(self, key, value):
+        if (key in self) and (self[key]==value):
+            return None # Unchanged, nobody is notified
+        super().__setitem__(key, value)
+        for callback, keys in list(self.subscribers):
+            if (keys is None) or (key in keys):
+                callback(key)
+        return None
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+        return None
+
+    def setdefault(self, key, default=None):
+        if (key not in self):
+            self[key] = default
+        return self[key]
+
+    def subscribe(self, callback, keys=None):
+        """callback(key) is called on every change of the given keys, or of any key"""
+        self.subscribers.append((callback, (None if keys is None else set(keys))))
+        return None
+
+    def unsubscribe(self, callback):
+        self.subscribers = [(c, k) for c, k in self.subscribers if (c!=callback)]
+        return None
+
+USERSTORAGE = ObservableStore() # Global storage for user data across all pages
 
 class Wizard(tk.Tk):
     def __init__(self):
@@ -217,7 +761,8 @@ class Wizard(tk.Tk):
         self.geometry(APP_SIZE)
         self.resizable(False, False)
 
-        sv_ttk.set_theme("dark") # Set modern Sun Valley theme
+        with span("sv_ttk.set_theme"):
+            sv_ttk.set_theme("dark") # Set modern Sun Valley theme
         set_window_icon(self)
 
         # Set window close protocol
@@ -240,24 +785,67 @@ class Wizard(tk.Tk):
         self.next_btn = ttk.Button(self.footer, text="Next", command=self.next_page, takefocus=0)
         self.next_btn.pack(side="right", padx=10, pady=10)
 
-        # Build pages
-        self.pages = []
-        self.page_active_idx = 0
-        self.pages.append(Page1(self.container, self.refresh_page,))
-        self.pages.append(Page2(self.container, self.refresh_page,))
-        self.pages.append(Page3(self.container, self.refresh_page,))
-        self.pages.append(Page4(self.container, self.refresh_page,))
-
-        # Set wizard reference for each classes
-        for p in self.pages:
-            p.wizard = self 
-            p.place(relx=0, rely=0, relwidth=1, relheight=1)
-
         # Define greyed out button style
         style = ttk.Style()
         style.configure('Transparent.TButton', foreground='#666666')
 
+        # Page registry, pages are built once the window is shown: the first one right away, the others while idle
+        self.page_classes = list(WIZARD_PAGES)
+        self.pages = [None] * len(self.page_classes)
+        self.page_active_idx = 0
+        self.prefetch_pending = None
+
+        # Footer refreshes are batched once per idle cycle, and only reconfigure what changed
+        self.footer_refresh_pending = None
+        self.footer_applied = {} #(widget, option) -> last applied value
+        USERSTORAGE.subscribe(self.on_storage_change)
+
+        # Lightweight loading state, the window can be shown and the splash closed before any page exists
+        self.loading_label = tk.Label(self.container, text="Loading...", font=("Segoe UI", 11), fg="#888888")
+        self.loading_label.place(relx=0.5, rely=0.4, anchor="center")
+        self.set_footer(self.prev_btn, "state", "disabled")
+        self.set_footer(self.next_btn, "state", "disabled")
+        self.first_interactive_ms = None #time to first interactive frame since main.py started, see on_first_interactive_frame()
+        self.after(0, self.build_first_page) # A timer, not an idle callback, so update_idletasks() maps the window without building it
+
+    def build_first_page(self):
+        """Second startup stage, build and show the first page"""
         self.update_page(0)
+        self.loading_label.destroy()
+        self.after_idle(self.on_first_interactive_frame)
+        return None
+
+    def on_first_interactive_frame(self):
+        """Idle right after the first page is shown: the user can interact with it from now on"""
+        self.first_interactive_ms = (time.perf_counter() - tracing.ORIGIN) * 1000
+        tracing.instant("first interactive frame")
+        print(f"[INFO]: First interactive frame after {self.first_interactive_ms:.0f} ms")
+        tracing.write_trace()
+        self.after_idle(prewarm_dialogs, self) # Dialogs then show instantly
+        threading.Thread(target=cleanup_extraction_cache, name="pywiz_cleanup", daemon=True).start()
+        return None
+
+    def get_page(self, idx: int):
+        """Return the page at the given index, building it on first access"""
+        page = self.pages[idx]
+        if (page is None):
+            with span("page constructor", page=self.page_classes[idx].__name__):
+                page = self.page_classes[idx](self.container, self.refresh_page,)
+            page.wizard = self
+            page.place(relx=0, rely=0, relwidth=1, relheight=1)
+            self.pages[idx] = page
+        return page
+
+    def prefetch_next_page(self):
+        """Build one page during idle time, the ones following the active page first, then reschedule until all are built"""
+        self.prefetch_pending = None
+        order = list(range(self.page_active_idx + 1, len(self.pages))) + list(range(self.page_active_idx))
+        missing = [idx for idx in order if (self.pages[idx] is None)]
+        if missing:
+            self.get_page(missing[0]).lower() # Keep the active page on top
+        if (len(missing) > 1):
+            self.prefetch_pending = self.after_idle(self.prefetch_next_page) # Next idle cycle, input events get through in between
+        return None
 
     # Navigation helpers
     def update_page(self, idx: int):
@@ -265,40 +853,66 @@ class Wizard(tk.Tk):
         if ((not self.pages) or (idx >= len(self.pages))):
             return None
         
+        current_page = self.get_page(idx)
         self.page_active_idx = idx
-        current_page = self.pages[idx]
-        
-        for i, p in enumerate(self.pages):
-            p.tkraise() if i == idx else None
-        
-        # Update page indicator with custom text
-        self.page_indicator.config(text=current_page.footer_text)
-        
-        # Update button labels
-        self.prev_btn.config(text=current_page.prev_button_name)
-        self.next_btn.config(text=current_page.next_button_name)
+        current_page.tkraise()
         
-        # Update button commands to call page-specific callbacks
-        self.prev_btn.config(command=current_page.prev_button_callback)
-        self.next_btn.config(command=current_page.next_button_callback)
+        # Properties fixed per page, only change when navigating
+        self.set_footer(self.page_indicator, "text", current_page.footer_text)
+        self.set_footer(self.prev_btn, "text", current_page.prev_button_name)
+        self.set_footer(self.next_btn, "text", current_page.next_button_name)
+        self.set_footer(self.prev_btn, "command", current_page.prev_button_callback)
+        self.set_footer(self.next_btn, "command", current_page.next_button_callback)
+
+        # Properties depending on the page state
+        self.refresh_footer()
+
+        # Build the remaining pages in the background while the user reads this one
+        if (self.prefetch_pending is None) and (None in self.pages):
+            self.prefetch_pending = self.after_idle(self.prefetch_next_page)
         
+        return None
+
+    def set_footer(self, widget, option, value):
+        """Configure a footer widget option, only if the value differs from the one last applied"""
+        key = (widget, option)
+        if (self.footer_applied.get(key, None)!=value):
+            widget.configure(**{option: value})
+            self.footer_applied[key] = value
+        return None
+
+    def refresh_footer(self):
+        """Recompute the footer button states and styles from the active page"""
+        self.footer_refresh_pending = None
+        current_page = self.pages[self.page_active_idx]
+        if (current_page is None): # Page is still being built
+            return None
+
         # Update button states enabled/disabled
-        can_prev = current_page.prev_button_enabled() if hasattr(current_page, 'prev_button_enabled') else True
-        self.prev_btn.config(state=("normal" if can_prev else "disabled"))
-        can_next = current_page.next_button_enabled() if hasattr(current_page, 'next_button_enabled') else True
-        self.next_btn.config(state=("normal" if can_next else "disabled"))
-        
+        self.set_footer(self.prev_btn, "state", ("normal" if current_page.prev_button_enabled() else "disabled"))
+        self.set_footer(self.next_btn, "state", ("normal" if current_page.next_button_enabled() else "disabled"))
+
         # Apply greyed out style if page wants transparency effect
-        is_prev_greyedout = current_page.prev_button_greyedout() if hasattr(current_page, 'prev_button_greyedout') else False
-        self.prev_btn.configure(style='Transparent.TButton' if is_prev_greyedout else 'TButton')
-        is_next_greyedout = current_page.next_button_greyedout() if hasattr(current_page, 'next_button_greyedout') else False
-        self.next_btn.configure(style='Transparent.TButton' if is_next_greyedout else 'TButton')
-        
+        self.set_footer(self.prev_btn, "style", ('Transparent.TButton' if current_page.prev_button_greyedout() else 'TButton'))
+        self.set_footer(self.next_btn, "style", ('Transparent.TButton' if current_page.next_button_greyedout() else 'TButton'))
         return None
 
     def refresh_page(self):
-        """Called by pages when their state changes - just refresh current page"""
-        self.update_page(self.page_active_idx)
+        """Called by pages when their state changes, the footer is refreshed once on the next idle cycle"""
+        if (self.footer_refresh_pending is None):
+            self.footer_refresh_pending = self.after_idle(self.refresh_footer)
+        return None
+
+    def on_storage_change(self, key):
+        """USERSTORAGE subscriber, only keys the active page footer depends on trigger a refresh"""
+        current_page = self.pages[self.page_active_idx]
+        if (current_page is not None) and (key in current_page.footer_keys):
+            self.refresh_page()
+        return None
+
+    def destroy(self):
+        USERSTORAGE.unsubscribe(self.on_storage_change)
+        super().destroy()
         return None
 
     def prev_page(self):
@@ -341,25 +955,36 @@ class PageBase(tk.Frame):
     #     self.wizard.prev_page/next_page()
     #     return None
 
-    # def prev_button_enabled/next_button_enabled(self)->bool:
-    #     """*CHILDREN DEFINED*: Override in subclasses to control Next button state"""
-    #     return True
+    footer_keys = () #USERSTORAGE keys the button states below depend on, the footer refreshes when one of them changes
+
+    def prev_button_enabled(self) -> bool:
+        """Override in subclasses to control Previous button state"""
+        return True
 
-    # def prev_button_greyedout/next_button_greyedout(self)->bool:
-    #     """*CHILDREN DEFINED*: Override to make Next button semi-transparent, like enabled==False but user can click it"""
-    #     return False  # Return True to make button transparent when disabled
+    def next_button_enabled(self) -> bool:
+        """Override in subclasses to control Next button state"""
+        return True
+
+    def prev_button_greyedout(self) -> bool:
+        """Override to make Previous button semi-transparent, like enabled==False but user can click it"""
+        return False
+
+    def next_button_greyedout(self) -> bool:
+        """Override to make Next button semi-transparent, like enabled==False but user can click it"""
+        return False  # Return True to make button transparent when disabled
 
     def __init__(self, parent, refresh_ui):
         super().__init__(parent) # Let Sun Valley theme handle background
         self.refresh_ui = refresh_ui
         self.wizard = None  # Will be set by Wizard class
 
-        # Load and display header image
-        header_image = load_header_image(self.page_number)
-        if (header_image is not None):
-            self.imageheader = tk.Label(self, image=header_image, borderwidth=0, highlightthickness=0)
-            self.imageheader.image = header_image  # Keep reference to prevent garbage collection
-            self.imageheader.pack(anchor="nw", padx=0, pady=0, fill="x")
+        # Header image, decoded in a worker thread then swapped into this cheap placeholder
+        placeholder = get_header_placeholder(self.page_number)
+        self.imageheader = tk.Label(self, borderwidth=0, highlightthickness=0, bg="#1c1c1c")
+        if (placeholder is not None):
+            self.imageheader.config(image=placeholder)
+        self.imageheader.pack(anchor="nw", padx=0, pady=0, fill="x")
+        load_header_image_async(self, self.page_number, self.set_header_image)
 
         # Title text (only if no image or as fallback)
         self.header = tk.Label(self, text=self.title_text, font=("Segoe UI", 16, "bold"))
@@ -377,6 +1002,17 @@ class PageBase(tk.Frame):
         
         #... children defined init..
 
+    def set_header_image(self, header_image):
+        """Swap the header placeholder with the decoded image"""
+        if (not self.imageheader.winfo_exists()):
+            return None
+        if (header_image is None):
+            self.imageheader.pack_forget()
+            return None
+        self.imageheader.config(image=header_image)
+        self.imageheader.image = header_image  # Keep reference to prevent garbage collection
+        return None
+
 # ooooooooo.                                    .o  
 # `888   `Y88.                                o888  
 #  888   .d88'  .oooo.    .oooooooo  .ooooo.   888  
@@ -387,11 +1023,14 @@ class PageBase(tk.Frame):
 #                        d"     YD                  
 #                        "Y88888P'                  
                                                   
+LICENSE_CHUNK_SIZE = 64 * 1024 #characters of license text inserted per idle callback
+
 class Page1(PageBase):
     page_number = 1
     title_text = "License Agreement"
     footer_text = f"Page {page_number}"
     prev_button_name = "Cancel"
+    footer_keys = ("license1_accepted",)
 
     def prev_button_callback(self) -> None:
         self.wizard.destroy()
@@ -403,7 +1042,7 @@ class Page1(PageBase):
             case False:
                 pop_warning_near_mouse(self.wizard,
                     title="Cannot continue",
-                    message="To continue the installation, agreeing with the license is required. The accept button will be available once you scroll to the end of the license text.",
+                    message="To continue the installation, agreeing with the license is required. " + ("The license could not be loaded, please download the installer again." if (self.license_error is not None) else "The accept button will be available once you scroll to the end of the license text."),
                     geometry="320x205",
                     )
             case True:
@@ -431,26 +1070,28 @@ class Page1(PageBase):
         self.scroll = ttk.Scrollbar(wrapper)
         self.scroll.pack(side="right", fill="y")
 
-        self.text = tk.Text(wrapper, wrap="word", yscrollcommand=self.scroll.set, height=26, background="#141414", borderwidth=0, highlightthickness=0)
+        # Every view change (wheel, keys, scrollbar, resize, text loading) goes through yscrollcommand
+        self.scroll_check_pending = None
+        self.text = tk.Text(wrapper, wrap="word", yscrollcommand=self.on_text_yscroll, height=26, background="#141414", borderwidth=0, highlightthickness=0)
         self.text.pack(side="left", fill="both", expand=True, padx=(0, 8),)
         self.scroll.config(command=self.text.yview)
 
-        # Populate large license text
-        lines = []
-        for i in range(1, 201):  # 200 lines of license text
-            lines.append(f"License Agreement Line {i}: Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
-                        f"Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. "
-                        f"Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat. "
-                        f"Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla pariatur.\n")
-        self.text.insert("1.0", "".join(lines))
+        # Stream the license text in chunks while idle, large texts must not delay the window
         self.text.config(state="disabled")
+        self.license_loaded = False
+        self.license_error = None # Set when the license could not be shown, it then can't be accepted
+        self.license_file = None
+        try: self.license_file = open(LICENSE_PATH, 'r', encoding='utf-8')
+        except Exception as e:
+            print(f"[ERROR]: Could not open license file '{LICENSE_PATH}': {e}")
+            self.license_error = f"Could not open the license file: {e}"
+        self.after_idle(self.load_license_chunk)
 
         # Accept toggle (disabled until scrolled to end)
         self.accept_var = tk.BooleanVar(value=USERSTORAGE["license1_accepted"])
 
         def on_toggle():
-            USERSTORAGE["license1_accepted"] = self.accept_var.get()
-            self.refresh_ui()
+            USERSTORAGE["license1_accepted"] = self.accept_var.get() # The footer follows through footer_keys
             return None
 
         self.accept_check = ttk.Checkbutton(layout, text="I accept the license agreement",
@@ -461,26 +1102,67 @@ class Page1(PageBase):
         tk.Label(layout, text="*Read the license first before accepting it. This button will be available once you scroll to the end of the license text.").pack(anchor="w", pady=(4, 0))
 
         # Track scroll position; enable checkbox only at end
-        self.bind_scroll_checks()
-        self.check_scroll()
-
-    def bind_scroll_checks(self):
-        # Bind events to the text widget
-        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<KeyRelease>", "<ButtonRelease-1>", "<Configure>"):
-            self.text.bind(seq, lambda e: self.after(50, self.check_scroll))
+        self.schedule_scroll_check()
+
+    def load_license_chunk(self):
+        """Insert the next chunk of the license text, then yield to the event loop until the next idle time"""
+        chunk = ""
+        if (self.license_file is not None):
+            try: chunk = self.license_file.read(LICENSE_CHUNK_SIZE)
+            except Exception as e:
+                print(f"[ERROR]: Could not read license file '{LICENSE_PATH}': {e}")
+                self.license_error = f"Could not read the license file: {e}"
+        if chunk and (self.license_error is None):
+            self.text.config(state="normal")
+            self.text.insert("end", chunk)
+            self.text.config(state="disabled")
+            self.after_idle(self.load_license_chunk)
+            return None
 
-        # Bind events to the scrollbar widget - check scroll state after interaction
-        def on_scrollbar_release(event):
-            self.after(50, self.check_scroll)
+        # Whole text loaded, the end of the text is now really the end of the license
+        if (self.license_file is not None):
+            self.license_file.close()
+        if (self.license_error is None) and (self.text.compare("end-1c", "==", "1.0")):
+            print(f"[ERROR]: License file is empty '{LICENSE_PATH}'")
+            self.license_error = "The license file is empty."
+        if (self.license_error is not None):
+            self.show_license_error()
             return None
-        
-        self.scroll.bind("<ButtonRelease-1>", on_scrollbar_release)
+        self.license_loaded = True
+        self.schedule_scroll_check()
+        return None
+
+    def show_license_error(self):
+        """Replace a partly loaded license with the error, the accept button stays disabled"""
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("end", f"{self.license_error}\n\n'{LICENSE_PATH}'\n\nThe license agreement can't be shown, so it can't be accepted. Please download the installer again.")
+        self.text.config(state="disabled", foreground="#ff6b6b")
+        self.accept_check.config(state="disabled")
+        self.accept_var.set(False)
+        USERSTORAGE["license1_scrolled_to_end"] = False
+        USERSTORAGE["license1_accepted"] = False
+        return None
+
+    def on_text_yscroll(self, first, last):
+        """Text yscrollcommand: keep the scrollbar in sync and schedule a scroll check"""
+        self.scroll.set(first, last)
+        self.schedule_scroll_check()
+        return None
+
+    def schedule_scroll_check(self):
+        """Debounce scroll checks, a burst of view changes only leads to a single pending check"""
+        if (self.scroll_check_pending is None):
+            self.scroll_check_pending = self.after(50, self.check_scroll)
         return None
 
     def check_scroll(self):
+        self.scroll_check_pending = None
         # yview returns (first, last) fractions of the document visible
         first, last = self.text.yview()
-        at_end = abs(last - 1.0) < 1e-3  # near bottom
+        at_end = self.license_loaded and (abs(last - 1.0) < 1e-3)  # near bottom, once every chunk is loaded, never if the license failed to load
+        if (at_end==USERSTORAGE["license1_scrolled_to_end"]):
+            return None  # Nothing the footer depends on changed
         USERSTORAGE["license1_scrolled_to_end"] = at_end
         if at_end:
             self.accept_check.config(state="normal")
@@ -488,7 +1170,6 @@ class Page1(PageBase):
             self.accept_check.config(state="disabled")
             self.accept_var.set(False)  # Reset acceptance if scrolled back up
             USERSTORAGE["license1_accepted"] = False
-        self.refresh_ui()
         return None
 
 # ooooooooo.                                    .oooo.   
@@ -522,14 +1203,9 @@ class Page2(PageBase):
         super().__init__(parent, refresh_ui)
         layout = self.layout
 
-        # Initialize state if needed
+        # Initialize state if needed, same defaults as a silent install
         if ("bool_option1" not in USERSTORAGE):
-            USERSTORAGE.update({
-                "bool_option1": True,
-                "enum_choice": "Standard",
-                "float_value": 50.0,
-                "int_value": 10,
-                })
+            USERSTORAGE.update({key: SILENT_DEFAULTS[key] for key in ("bool_option1", "enum_choice", "float_value", "int_value")})
 
         # Panel 1: Boolean Checkbox
         ttk.Label(layout, text="Installation Options:", font=("Segoe UI", 11, "bold")).pack(anchor="w", pady=(0, 8))
@@ -625,25 +1301,36 @@ class Page2(PageBase):
 #                        d"     YD
 #                        "Y88888P'
 
+INSTALL_FRAME_MS = 33 #install progress is drained from the engine at ~30 fps
+
 class Page3(PageBase):
-    page_number = 3
-    title_text = "Loadbar Test"
+    page_number = 4 # Shown after Page4, the install directory has to be chosen first
+    title_text = "Installation"
     footer_text = f"Page {page_number}"
+    next_button_name = "Finish"
 
     def prev_button_callback(self) -> None:
         self.wizard.prev_page()
         return None
 
+    def prev_button_enabled(self) -> bool:
+        return (self.loadbar_loading==False) # Can't change the install options while files are being written
+
     def next_button_callback(self) -> None:
         match self.loadbar_complete:
             case False:
                 pop_warning_near_mouse(self.wizard,
-                    title="Cannot continue",
-                    message="Loadbar has to be completed before continuing.",
+                    title="Cannot finish",
+                    message="The installation has to be completed before finishing.",
                     geometry="320x155",
                     )
             case True:
-                self.wizard.next_page()
+                pop_success_message(self.wizard,
+                    title="Installation Complete!",
+                    message="Your application has been successfully installed!\n\nThe installation process is now complete.\nThanks!",
+                    geometry="320x220",
+                    )
+                self.wizard.destroy()
         return None
 
     def next_button_greyedout(self) -> bool:
@@ -656,6 +1343,11 @@ class Page3(PageBase):
         self.loadbar_complete = False
         self.loadbar_progress = 0
         self.loadbar_loading = False
+        self.engine = None
+        self.installed_files = 0
+        self.install_errors = []
+        self.install_phase = ""
+        self.install_unchanged = 0
 
         # Initialize state if needed
         if ("loadbar_progress" not in USERSTORAGE):
@@ -665,7 +1357,7 @@ class Page3(PageBase):
                 })
 
         # Title and description
-        tk.Label(layout, text="This page demonstrates a fake loading process with a progress bar.\nClick the button below to start the loading simulation.").pack(anchor="w", pady=(0, 20))
+        tk.Label(layout, text="Click the button below to install the application files\nin the chosen install directory.").pack(anchor="w", pady=(0, 20))
         # Progress bar and button container
         progress_frame = tk.Frame(layout)
         progress_frame.pack(fill="x", pady=(20, 0))
@@ -677,53 +1369,132 @@ class Page3(PageBase):
         self.start_button = ttk.Button(progress_frame, text="Start", command=self.start_loadbar, takefocus=0)
         self.start_button.pack(side="right", padx=(10, 0))
         # Status label (full width below progress bar)
-        self.status_label = tk.Label(layout, text="Ready to start loading", font=("Segoe UI", 10), fg="#888888")
+        self.status_text = "Ready to install"
+        self.status_label = tk.Label(layout, text=self.status_text, font=("Segoe UI", 10), fg="#888888")
         self.status_label.pack(anchor="w", pady=(0, 0))
 
     def start_loadbar(self):
         if (self.loadbar_loading==True):
             return None
         self.loadbar_loading = True
-        self.start_button.config(state="disabled", text="Loading")
+        self.start_button.config(state="disabled", text="Installing")
         self.loadbar_progress = 0
         self.progress_var.set(0)
-        self.status_label.config(text="Initializing loading...", fg="#ffffff")
+        self.set_status("Reading payload...")
         self.loadbar_complete = False
+        self.installed_files = 0
+        self.install_errors = []
+        self.install_phase = ""
+        self.install_unchanged = 0
         self.refresh_ui()
-        self.update_progress()
+
+        # Extraction runs in worker threads, this page only reads its progress at a fixed frame rate
+        payload_path = locate_payload(ASSETS_DIR) # Appended to the executable, or shipped in the assets
+        components = INSTALL_TYPE_COMPONENTS.get(USERSTORAGE.get("enum_choice")) # Same selection as the free space check of Page4
+        self.engine = InstallEngine(payload_path, USERSTORAGE["install_dir"], workers=USERSTORAGE.get("int_value", 4), components=components)
+
+        # Look for an interrupted install off the main thread, it reads the payload index and the journal
+        self.after(INSTALL_FRAME_MS, self.poll_resumable, self.engine, submit_daemon(self.engine.find_resumable, name="pywiz_resume"))
+        return None
+
+    def poll_resumable(self, engine, future):
+        if (engine is not self.engine) or engine.cancelled.is_set(): # Page destroyed meanwhile
+            return None
+        if (not future.done()):
+            self.after(INSTALL_FRAME_MS, self.poll_resumable, engine, future)
+            return None
+        try: resumable = future.result()
+        except Exception as e:
+            print(f"[WARNING]: Could not read the interrupted installation: {e}")
+            resumable = None
+
+        # An install into this directory was interrupted, offer to continue it instead of writing everything again
+        if (resumable is not None):
+            engine.resume = pop_confirmation_dialog(self.wizard, title="Resume installation",
+                message=f"A previous installation into this directory stopped at {resumable:.0%}.\nResume it?", confirm_text="Resume", cancel_text="Start over")
+        engine.start()
+        self.after(INSTALL_FRAME_MS, self.update_progress)
         return None
 
     def update_progress(self):
         if (self.loadbar_loading==False):
             return None
 
-        self.loadbar_progress += 1
-        self.progress_var.set(self.loadbar_progress)
-        USERSTORAGE["loadbar_progress"] = self.loadbar_progress
+        # Low frequency state changes
+        done = None
+        for kind, data in self.engine.drain_events():
+            match kind:
+                case "plan":
+                    self.install_unchanged = data[1] # Files kept from a previous install
+                case "phase":
+                    self.install_phase = data
+                case "error":
+                    print(f"[ERROR]: Install: {data[0]}: {data[1]}")
+                    self.install_errors.append(data)
+                case "done":
+                    done = data
+
+        # Byte and file progress, coalesced by the engine into one snapshot per frame
+        done_bytes, total_bytes, self.installed_files, total_files, rate, eta = self.engine.progress.snapshot()
+        if (total_bytes > 0):
+            progress = 100 * done_bytes / total_bytes
+        else:
+            progress = 100 if (done==True) else 0 # Nothing to write
+        if (abs(progress - self.loadbar_progress) >= 0.1) or (progress==100):
+            self.loadbar_progress = progress
+            self.progress_var.set(progress)
+            USERSTORAGE["loadbar_progress"] = progress
 
-        # Update status messages based on progress
-        match self.loadbar_progress:
-            case v if (v >= 100):
-                self.status_label.config(text="Loading complete!", fg="#00ff00")
+        match done:
+            case True:
+                unchanged = f", {self.install_unchanged} already up to date" if self.install_unchanged else ""
+                self.set_status(f"Installation complete! {self.installed_files} files installed{unchanged}", "#00ff00")
                 self.loadbar_complete = True
                 self.loadbar_loading = False
-                self.start_button.config(state="normal", text="Done")
+                self.start_button.config(state="disabled", text="Done")
                 USERSTORAGE["loadbar_complete"] = True
                 self.refresh_ui()
-                return
-            case 70:
-                self.status_label.config(text="Finalizing installation...", fg="#ffffff")
-            case 50:
-                self.status_label.config(text="Configuring settings...", fg="#ffffff")
-            case 30:
-                self.status_label.config(text="Installing dependencies...", fg="#ffffff")
-            case 20:
-                self.status_label.config(text="Loading core files...", fg="#ffffff")
+                return None
+            case False:
+                message = self.install_errors[0][1] if self.install_errors else "Unknown error"
+                self.set_status(f"Installation failed: {message}", "#ff5555")
+                self.loadbar_loading = False
+                self.start_button.config(state="normal", text="Retry")
+                self.refresh_ui()
+                return None
+            case None:
+                speed = format_progress(rate, eta) if (done_bytes > 0) else ""
+                match self.install_phase:
+                    case "verify_payload":
+                        self.set_status(f"Verifying payload integrity...  {speed}")
+                    case "extract":
+                        self.set_status(f"Installing files... {self.installed_files}/{total_files}  {speed}")
+                    case "remove":
+                        self.set_status("Removing obsolete files...")
+                    case "verify_install":
+                        self.set_status(f"Verifying installed files...  {speed}")
+
+        # Schedule next frame
+        self.after(INSTALL_FRAME_MS, self.update_progress)
+        return None
+
+    def set_status(self, text, color="#ffffff"):
+        """Update the status label, only when its text actually changed"""
+        if (text==self.status_text):
+            return None
+        self.status_text = text
+        self.status_label.config(text=text, fg=color)
+        return None
 
-        # Schedule next update
-        self.after(40, self.update_progress)
+    def destroy(self):
+        # Stop the workers if the wizard is closed mid-install
+        if (self.engine is not None):
+            self.engine.cancel()
+        super().destroy()
         return None
 
+PATHCHECKCACHE = {} #(path, installation type) -> (time checked, result), only touched on the Tk main thread
+
 # ooooooooo.                                        .o   
 # `888   `Y88.                                    .d88   
 #  888   .d88'  .oooo.    .oooooooo  .ooooo.    .d'888   
@@ -735,33 +1506,38 @@ class Page3(PageBase):
 #                        "Y88888P'                       
                                                        
 class Page4(PageBase):
-    page_number = 4
+    page_number = 3 # Shown before Page3, which installs into the chosen directory
     title_text = "Define Install Directory"
     footer_text = f"Page {page_number}"
-    next_button_name = "Finish"
+    next_button_name = "Install"
+    footer_keys = ("install_dir_valid",)
+
+    VALIDATE_DELAY_MS = 150 #wait for the user to stop typing before validating
+    VALIDATE_POLL_MS = 30
 
     def prev_button_callback(self) -> None:
         self.wizard.prev_page()
         return None
 
     def next_button_greyedout(self) -> bool:
-        return (self.path_var_valid==False)
+        return (USERSTORAGE["install_dir_valid"]==False)
 
     def next_button_callback(self) -> None:
         match self.path_var_valid:
+            case None:
+                pop_warning_near_mouse(self.wizard,
+                    title="Please wait",
+                    message="The install directory is still being checked.",
+                    geometry="320x180",
+                    )
             case False:
                 pop_warning_near_mouse(self.wizard,
                     title="Cannot continue",
-                    message="The install directory is not a directory. Please select a valid directory, and not a file.",
+                    message=f"The install directory is not valid: {self.path_var_message}. Please select a writable directory.",
                     geometry="320x180",
                     )
             case True:
-                pop_success_message(self.wizard,
-                    title="Installation Complete!",
-                    message="Your application has been successfully installed!\n\nThe installation process is now complete.\nThanks!",
-                    geometry="320x220",
-                    )
-                self.wizard.destroy()
+                self.wizard.next_page()
         return None
 
     def __init__(self, parent, refresh_ui):
@@ -772,6 +1548,7 @@ class Page4(PageBase):
         if ("install_dir" not in USERSTORAGE):
             USERSTORAGE.update({
                 "install_dir": "",
+                "install_dir_valid": False,
                 })
 
         # Field + validation color
@@ -781,7 +1558,13 @@ class Page4(PageBase):
         ttk.Label(path_row, text="Install directory:").pack(side="left", padx=(0, 8))
         self.path_var = tk.StringVar(value=USERSTORAGE["install_dir"],)
         self.path_var_stripped = self.path_var.get().strip()
-        self.path_var_valid = False
+        self.path_var_valid = False #None while a validation is running
+        self.path_var_message = ""
+
+        # Validation runs in a worker, only the latest request is applied
+        self.validate_pending = None
+        self.validate_future = None
+        self.validate_generation = 0
 
         self.entry = tk.Entry(path_row, textvariable=self.path_var, width=60, takefocus=0, background="#141414", borderwidth=0, highlightthickness=0)
         self.entry.pack(side="left", fill="x", expand=True, ipady=6)
@@ -790,60 +1573,133 @@ class Page4(PageBase):
         def pick_dir():
             d = filedialog.askdirectory(title="Select installation directory")
             self.path_var.set(d)
-            self.sync_and_validate()
+            self.sync_and_validate(delay=0)
             return None
 
         ttk.Button(path_row, text="Browse...", command=pick_dir, takefocus=0).pack(side="left", padx=8)
 
+        self.status_label = tk.Label(layout, text="", font=("Segoe UI", 10), fg="#888888")
+        self.status_label.pack(anchor="w", pady=(0, 4))
+
         # Operator button: append F:/This/Path
         def append_magic():
             self.path_var.set(self.path_var.get() + (" " if self.path_var.get() else "") + "F:/This/Path")
-            self.sync_and_validate()
+            self.sync_and_validate(delay=0)
             return None
 
         ttk.Button(layout, text="Append F:/This/Path", command=append_magic, takefocus=0).pack(anchor="w", pady=8)
-        self.refresh_ui()
 
-    def sync_and_validate(self):
+        # The required space depends on the installation type chosen on Page2
+        USERSTORAGE.subscribe(self.on_installation_type_change, keys=("enum_choice",))
+
+        if self.path_var_stripped:
+            self.sync_and_validate(delay=0)
+
+    def on_installation_type_change(self, key):
+        if self.path_var_stripped:
+            self.sync_and_validate(delay=0)
+        return None
+
+    def sync_and_validate(self, delay=None):
+        """Store the path and schedule its validation, the footer stays greyed out until the answer comes back"""
         self.path_var_stripped = self.path_var.get().strip()
-        self.path_var_valid = os.path.isdir(self.path_var_stripped)
         USERSTORAGE["install_dir"] = self.path_var_stripped
-        self.entry.config(bg=("#141414" if self.path_var_valid else "#600000"))
-        self.refresh_ui()
+
+        # Reuse a recent answer for this path
+        cached = PATHCHECKCACHE.get((self.path_var_stripped, USERSTORAGE.get("enum_choice")))
+        if (cached is not None) and (time.monotonic() - cached[0] < PATHCHECK_TTL):
+            self.cancel_validation()
+            self.apply_validation(cached[1])
+            return None
+
+        self.cancel_validation()
+        self.set_validation_state(None, "Checking...")
+        self.validate_pending = self.after((self.VALIDATE_DELAY_MS if delay is None else delay), self.start_validation)
+        return None
+
+    def cancel_validation(self):
+        """Drop the scheduled or running validation, a running check can't be interrupted but its answer is ignored"""
+        self.validate_generation += 1
+        if (self.validate_pending is not None):
+            self.after_cancel(self.validate_pending)
+            self.validate_pending = None
+        if (self.validate_future is not None):
+            self.validate_future.cancel()
+            self.validate_future = None
+        return None
+
+    def start_validation(self):
+        self.validate_pending = None
+        # One daemon thread per check: a path hanging on a network share neither holds back the next checks nor the process exit
+        key = (self.path_var_stripped, USERSTORAGE.get("enum_choice"))
+        self.validate_future = submit_daemon(check_install_dir, *key, name="pywiz_pathcheck")
+        self.after(self.VALIDATE_POLL_MS, self.poll_validation, self.validate_future, self.validate_generation, key)
+        return None
+
+    def poll_validation(self, future, generation, key):
+        if (generation!=self.validate_generation): # Superseded by a newer request
+            return None
+        if (not future.done()):
+            self.after(self.VALIDATE_POLL_MS, self.poll_validation, future, generation, key)
+            return None
+        self.validate_future = None
+        try: result = future.result()
+        except Exception as e:
+            result = (False, f"Could not check directory: {e}", None)
+        # Drop the expired answers, they would never be reused
+        now = time.monotonic()
+        for expired in [k for k, (checked, _) in PATHCHECKCACHE.items() if (now - checked >= PATHCHECK_TTL)]:
+            del PATHCHECKCACHE[expired]
+        PATHCHECKCACHE[key] = (now, result)
+        self.apply_validation(result)
+        return None
+
+    def apply_validation(self, result):
+        valid, message, free_bytes = result
+        self.set_validation_state(valid, message)
         return None
 
+    def set_validation_state(self, valid, message):
+        """valid is None while checking"""
+        self.path_var_valid = valid
+        self.path_var_message = message
+        USERSTORAGE["install_dir_valid"] = (valid==True) # Footer only refreshes when validity flips
+        match valid:
+            case None:
+                self.entry.config(bg="#3A3000")
+                self.status_label.config(text=message, fg="#888888")
+            case True:
+                self.entry.config(bg="#141414")
+                self.status_label.config(text=message, fg="#00ff00")
+            case False:
+                self.entry.config(bg="#600000")
+                self.status_label.config(text=message, fg="#ff5555")
+        return None
+
+    def destroy(self):
+        self.cancel_validation()
+        USERSTORAGE.unsubscribe(self.on_installation_type_change)
+        super().destroy()
+        return None
+
+# Wizard page registry, in display order. Pages are built lazily by the Wizard
+WIZARD_PAGES = [Page1, Page2, Page4, Page3]
+
 if __name__ == "__main__":
     print('Launching the program...')
+    hold_extraction_lock() # Before anything is read lazily from the extraction
 
-    # Initialize the main app (this takes time)
-    app = Wizard()
+    # Initialize the main app, only the window and its footer, the pages are built once it is shown
+    with span("Wizard.__init__"):
+        app = Wizard()
 
-    # Hide PyInstaller splash screen if it exists
-    try:
-        import pyi_splash
-        # Close splash immediately when app is ready
-        pyi_splash.close()
-        print("[SPLASH] PyInstaller splash screen closed successfully")
-    except ImportError:
-        # PyInstaller splash not available, that's fine
-        print("[SPLASH] PyInstaller splash screen not available (not using --splash)")
-    except Exception as e:
-        print(f"[SPLASH] Error closing splash screen: {e}")
-        # Try to force close it
-        try:
-            import pyi_splash
-            # Try multiple close attempts
-            for _ in range(3):
-                try:
-                    pyi_splash.close()
-                    break
-                except:
-                    import time
-                    time.sleep(0.1)
-            print("[SPLASH] Forced splash close attempted")
-        except:
-            print("[SPLASH] All splash close methods failed")
+    # Map the window with its loading state, then hand over from the bootloader splash, pages are built by the mainloop
+    app.update_idletasks()
+    close_splash(app)
+
+    # Startup trace, written at the first interactive frame and again at exit
+    if tracing.TRACING:
+        app.after_idle(tracing.start_span("mainloop first idle").end)
 
     print("[APP] Starting main application...")
     app.mainloop()
-
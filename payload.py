@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import hashlib
+import lzma
+import zlib
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+#NOTE: indexed payload archive, shared by the build scripts (writing) and the install engine (reading).
+#NOTE: layout: [compressed blocks..][json index][footer], offsets are relative to the start of the payload,
+#      so the same payload works as a standalone '.pwz' file or appended at the end of the executable,
+#      where the bootloader never extracts it. Blocks are then read in place through mmap.
+#NOTE: every member is split in blocks of BLOCK_SIZE compressed independently, so blocks can be
+#      decompressed and verified by several threads at once (zlib, lzma and hashlib release the GIL).
+
+PAYLOAD_MAGIC = b"PYWIZPK2"
+PAYLOAD_FOOTER = struct.Struct("<8sQQ") #magic, payload length (footer included), index size
+PAYLOAD_FILENAME = 'payload.pwz'
+PAYLOAD_ZIPNAME = 'payload.zip'
+BLOCK_SIZE = 4 * 1024 * 1024 #uncompressed size of a block, also the unit of hashing
+PAYLOAD_CODECS = ("zlib", "lzma", "store")
+DEFAULT_COMPONENT = "core" #component of the files at the root of the payload folder, each subfolder is a component
+
+#------------------------- WRITE ------------------------
+#--------------------------------------------------------
+
+def list_payload_files(src_dir):
+    """list (relative posix path, absolute path) of every file to pack, sorted for reproducible payloads"""
+    files = []
+    for root, dirs, filenames in os.walk(src_dir):
+        dirs.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            files.append((os.path.relpath(path, src_dir).replace(os.sep, '/'), path))
+    return files
+
+def get_component(relpath):
+    """component of a payload member, its top level folder"""
+    head, sep, tail = relpath.partition('/')
+    return head if sep else DEFAULT_COMPONENT
+
+def sum_components(members):
+    """component -> total uncompressed size of its members"""
+    components = {}
+    for member in members:
+        component = member.get("component", DEFAULT_COMPONENT)
+        components[component] = components.get(component, 0) + member["size"]
+    return components
+
+def compress_block(data, codec):
+    """return (codec, compressed bytes), blocks that don't shrink are stored as is"""
+    match codec:
+        case "zlib":
+            packed = zlib.compress(data, 6)
+        case "lzma":
+            packed = lzma.compress(data, preset=6)
+        case "store":
+            return "store", data
+    if (len(packed) >= len(data)):
+        return "store", data
+    return codec, packed
+
+def decompress_block(data, codec):
+    match codec:
+        case "zlib":
+            return zlib.decompress(data)
+        case "lzma":
+            return lzma.decompress(data)
+        case "store":
+            return bytes(data)
+    raise ValueError(f"Unknown payload codec '{codec}'")
+
+def write_payload(src_dir, dst_path, append=False, codec="zlib", block_size=BLOCK_SIZE, workers=None, before_index=None):
+    """pack every file of src_dir into an indexed payload of independently compressed blocks with sha256 hashes,
+    written to dst_path or appended to it, returns the payload size.
+    before_index(offset) may return bytes written between the blocks and the index, at that offset of dst_path"""
+    assert codec in PAYLOAD_CODECS, f"[ERROR]: unknown payload codec '{codec}'"
+    workers = workers or os.cpu_count() or 4
+    members = []
+    with open(dst_path, 'ab' if append else 'wb') as dst, ThreadPoolExecutor(max_workers=workers) as pool:
+        dst.seek(0, os.SEEK_END)
+        base = dst.tell()
+
+        def pack(data):
+            used, packed = compress_block(data, codec)
+            return hashlib.sha256(data).hexdigest(), used, packed, hashlib.sha256(packed).hexdigest()
+
+        for relpath, path in list_payload_files(src_dir):
+            digest = hashlib.sha256()
+            chunks, blocks = [], []
+            with open(path, 'rb') as src:
+                while True:
+                    # Compress a batch of blocks in parallel, written back in order
+                    batch = [data for data in (src.read(block_size) for _ in range(workers)) if data]
+                    if (not batch):
+                        break
+                    for data in batch:
+                        digest.update(data)
+                    for chunk_sha256, used, packed, block_sha256 in pool.map(pack, batch):
+                        blocks.append([dst.tell() - base, len(packed), used, block_sha256])
+                        chunks.append(chunk_sha256)
+                        dst.write(packed)
+            if (not blocks): # Empty file, still one block so every member gets verified
+                empty_sha256 = hashlib.sha256(b'').hexdigest()
+                blocks.append([dst.tell() - base, 0, "store", empty_sha256])
+                chunks.append(empty_sha256)
+            stat = os.stat(path)
+            members.append({"path": relpath, "size": stat.st_size, "mtime": stat.st_mtime, "component": get_component(relpath),
+                            "sha256": digest.hexdigest(), "chunks": chunks, "blocks": blocks})
+
+        # Blocks are addressed by offset, extra bytes before the index are never read back
+        if (before_index is not None):
+            dst.write(before_index(dst.tell()))
+
+        # Uncompressed size per component, lets the installer check the free space before extracting anything
+        index = json.dumps({"version": 2, "block_size": block_size, "components": sum_components(members), "members": members},
+                           separators=(',', ':')).encode('utf-8')
+        dst.write(index)
+        length = dst.tell() - base + PAYLOAD_FOOTER.size
+        dst.write(PAYLOAD_FOOTER.pack(PAYLOAD_MAGIC, length, len(index)))
+
+    return length
+
+#-------------------------- READ ------------------------
+#--------------------------------------------------------
+
+def read_payload_footer(path):
+    """return (payload_length, index_size) if the file ends with a payload, otherwise None"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if (f.tell() < PAYLOAD_FOOTER.size):
+                return None
+            f.seek(-PAYLOAD_FOOTER.size, os.SEEK_END)
+            magic, length, index_size = PAYLOAD_FOOTER.unpack(f.read(PAYLOAD_FOOTER.size))
+    except OSError:
+        return None
+    if (magic!=PAYLOAD_MAGIC):
+        return None
+    return length, index_size
+
+def locate_payload(assets_dir):
+    """find the payload: appended to the executable first, then standalone in the assets, then as a zip"""
+    candidates = []
+    if getattr(sys, 'frozen', False) or ('__compiled__' in globals()):
+        candidates += [sys.executable, os.path.abspath(sys.argv[0])] # PyInstaller / Nuitka onefile executable
+    candidates.append(os.path.join(assets_dir, PAYLOAD_FILENAME))
+    for path in candidates:
+        if os.path.isfile(path) and (read_payload_footer(path) is not None):
+            return path
+    zip_path = os.path.join(assets_dir, PAYLOAD_ZIPNAME)
+    if os.path.isfile(zip_path):
+        return zip_path
+    return None
+
+class PayloadReader:
+    """read blocks of an indexed payload in place through a read-only mmap, safe to share across threads"""
+
+    def __init__(self, path):
+        footer = read_payload_footer(path)
+        if (footer is None):
+            raise ValueError(f"Not a payload file '{path}'")
+        length, index_size = footer
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.base = len(self.mm) - length
+        index_end = len(self.mm) - PAYLOAD_FOOTER.size
+        self.index = json.loads(self.mm[index_end - index_size:index_end])
+        self.members = self.index["members"]
+        self.block_size = self.index["block_size"]
+        self.components = self.index.get("components") or sum_components(self.members)
+
+    def read_block(self, member, idx):
+        """zero-copy memoryview of the compressed block at the given index"""
+        offset, size, codec, block_sha256 = member["blocks"][idx]
+        start = self.base + offset
+        return memoryview(self.mm)[start:start + size]
+
+    def decompress_block(self, member, idx):
+        """uncompressed bytes of the block at the given index"""
+        with self.read_block(member, idx) as data:
+            return decompress_block(data, member["blocks"][idx][2])
+
+    def iter_chunks(self, member, chunk_size=None):
+        """yield the uncompressed blocks of the member in order"""
+        for idx in range(len(member["blocks"])):
+            yield self.decompress_block(member, idx)
+        return None
+
+    def close(self):
+        try: self.mm.close()
+        except BufferError: # A worker still holds a slice, released with the mapping at exit
+            pass
+        self.file.close()
+        return None
+
+class ZipPayloadReader:
+    """same interface as PayloadReader for a plain zip payload, one zip handle per thread, no sha256 manifest"""
+
+    def __init__(self, path):
+        self.path = path
+        self.block_size = BLOCK_SIZE
+        self.local = threading.local()
+        self.archives = [] #every per thread handle, closed together by close()
+        self.lock = threading.Lock()
+        with zipfile.ZipFile(path) as archive:
+            self.members = [{
+                "path": info.filename,
+                "size": info.file_size,
+                "mtime": time.mktime(info.date_time + (0, 0, -1)),
+                "component": get_component(info.filename),
+                "info": info,
+                } for info in archive.infolist() if not info.is_dir()]
+        self.components = sum_components(self.members)
+
+    def iter_chunks(self, member, chunk_size):
+        archive = getattr(self.local, "archive", None)
+        if (archive is None):
+            archive = self.local.archive = zipfile.ZipFile(self.path)
+            with self.lock:
+                self.archives.append(archive)
+        with archive.open(member["info"]) as src:
+            for chunk in iter(lambda: src.read(chunk_size), b''):
+                yield chunk
+        return None
+
+    def close(self):
+        with self.lock:
+            archives, self.archives = self.archives, []
+        for archive in archives:
+            archive.close()
+        return None
+
+def open_payload(path):
+    """open a payload file, indexed payload or zip"""
+    if (path is None) or (not os.path.isfile(path)):
+        raise FileNotFoundError(f"Payload not found '{path}'")
+    if (read_payload_footer(path) is not None):
+        return PayloadReader(path)
+    return ZipPayloadReader(path)
@@ -0,0 +1,267 @@
+import os
+import sys
+import time
+import zipfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import payload
+import install_engine
+from install_engine import InstallEngine, MANIFEST_FILENAME, JOURNAL_FILENAME, format_progress
+from payload import write_payload, open_payload, read_payload_footer, PAYLOAD_FILENAME, PAYLOAD_CODECS
+
+BLOCK_SIZE = 4096 #small blocks, so every file spans several of them
+
+FILES = {
+    "app.bin": os.urandom(5 * BLOCK_SIZE + 123),
+    "readme.txt": b"hello\n" * 1000,
+    "empty.dat": b"",
+    "docs/manual.txt": b"manual " * 3000,
+    "docs/extra/notes.txt": b"notes\n" * 10,
+    }
+
+def write_tree(src_dir, files):
+    for relpath, data in files.items():
+        path = os.path.join(src_dir, *relpath.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+    return None
+
+def pack(tmp_path, files, name=PAYLOAD_FILENAME, codec="zlib"):
+    src_dir = str(tmp_path / (name + ".src"))
+    write_tree(src_dir, files)
+    payload_path = str(tmp_path / name)
+    write_payload(src_dir, payload_path, codec=codec, block_size=BLOCK_SIZE, workers=2)
+    return payload_path
+
+def pack_zip(tmp_path, files, name="payload.zip"):
+    payload_path = str(tmp_path / name)
+    with zipfile.ZipFile(payload_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for relpath, data in files.items():
+            archive.writestr(relpath, data)
+    return payload_path
+
+def install(payload_path, install_dir, **kwargs):
+    """Run an install, return (success, events)"""
+    engine = InstallEngine(payload_path, install_dir, workers=2, **kwargs)
+    success = engine.run()
+    return success, engine.drain_events()
+
+def get_event(events, kind):
+    return next(value for name, value in events if (name==kind))
+
+def assert_installed(install_dir, files):
+    for relpath, data in files.items():
+        with open(os.path.join(install_dir, *relpath.split('/')), 'rb') as f:
+            assert f.read()==data, relpath
+    assert os.path.exists(os.path.join(install_dir, MANIFEST_FILENAME))
+    assert not os.path.exists(os.path.join(install_dir, JOURNAL_FILENAME))
+
+@pytest.fixture
+def payload_path(tmp_path):
+    return pack(tmp_path, FILES)
+
+@pytest.fixture
+def install_dir(tmp_path):
+    return str(tmp_path / "install")
+
+def test_fresh_install(payload_path, install_dir):
+    success, events = install(payload_path, install_dir)
+    assert success
+    assert get_event(events, "plan")==(len(FILES), 0, 0)
+    assert_installed(install_dir, FILES)
+
+@pytest.mark.parametrize("codec", PAYLOAD_CODECS)
+def test_codecs(tmp_path, install_dir, codec):
+    assert install(pack(tmp_path, FILES, codec=codec), install_dir)[0]
+    assert_installed(install_dir, FILES)
+
+def test_noop_upgrade(payload_path, install_dir):
+    assert install(payload_path, install_dir)[0]
+    success, events = install(payload_path, install_dir)
+    assert success
+    assert get_event(events, "plan")==(0, len(FILES), 0)
+    assert_installed(install_dir, FILES)
+
+def test_tampered_file_is_written_again(payload_path, install_dir):
+    assert install(payload_path, install_dir)[0]
+    target = os.path.join(install_dir, "app.bin")
+    with open(target, 'r+b') as f: # Same size, different content and modification time
+        f.write(b"\0" * 16)
+    os.utime(target, (1, 1))
+    success, events = install(payload_path, install_dir)
+    assert success
+    assert get_event(events, "plan")==(1, len(FILES) - 1, 0)
+    assert_installed(install_dir, FILES)
+
+def test_changed_and_removed_members(tmp_path, payload_path, install_dir):
+    assert install(payload_path, install_dir)[0]
+    files = {relpath: data for relpath, data in FILES.items() if (relpath!="docs/extra/notes.txt")}
+    files["readme.txt"] = b"changed\n"
+    success, events = install(pack(tmp_path, files, name="payload2.pwz"), install_dir)
+    assert success
+    assert get_event(events, "plan")==(1, len(files) - 1, 1)
+    assert not os.path.exists(os.path.join(install_dir, "docs", "extra")) # Emptied directories go too
+    assert_installed(install_dir, files)
+
+def test_required_space_is_the_upgrade_delta(tmp_path, payload_path, install_dir):
+    os.makedirs(install_dir)
+    total = sum(len(data) for data in FILES.values())
+    assert InstallEngine(payload_path, install_dir).get_required_space()==total
+    assert install(payload_path, install_dir)[0]
+    assert InstallEngine(payload_path, install_dir).get_required_space()==0
+    files = dict(FILES, **{"readme.txt": FILES["readme.txt"] * 2, "docs/manual.txt": b"shorter"})
+    engine = InstallEngine(pack(tmp_path, files, name="payload2.pwz"), install_dir)
+    assert engine.get_required_space()==len(FILES["readme.txt"]) # The shrinking file frees nothing
+
+def test_progress_reaches_total(payload_path, install_dir):
+    engine = InstallEngine(payload_path, install_dir, workers=2)
+    assert engine.run()
+    done_bytes, total_bytes, done_files, total_files, rate, eta = engine.progress.snapshot()
+    assert (done_bytes==total_bytes) and (total_bytes > 0)
+    assert done_files==total_files==len(FILES)
+
+def test_format_progress():
+    assert format_progress(2 * 1024 * 1024, 75)=="2.0 MB/s, 1 min 15 s left"
+    assert format_progress(0, None)=="0.0 MB/s"
+
+def test_zip_payload(tmp_path, install_dir):
+    assert install(pack_zip(tmp_path, FILES), install_dir)[0]
+    assert_installed(install_dir, FILES)
+
+def test_zip_payload_closes_every_handle(monkeypatch, tmp_path, install_dir):
+    opened = []
+    class ZipFile(zipfile.ZipFile):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+    monkeypatch.setattr(payload.zipfile, "ZipFile", ZipFile)
+    assert install(pack_zip(tmp_path, FILES), install_dir)[0]
+    assert len(opened) > 1 # The index, then one handle per worker thread
+    assert all((archive.fp is None) for archive in opened)
+
+def test_payload_appended_to_executable(tmp_path, install_dir):
+    exe_path = str(tmp_path / "installer.exe")
+    with open(exe_path, 'wb') as f:
+        f.write(os.urandom(100 * 1024)) # Stands for the bootloader and its archive
+    src_dir = str(tmp_path / "src")
+    write_tree(src_dir, FILES)
+    length = write_payload(src_dir, exe_path, append=True, block_size=BLOCK_SIZE, workers=2)
+    assert read_payload_footer(exe_path)[0]==length
+    assert install(exe_path, install_dir)[0]
+    assert_installed(install_dir, FILES)
+
+def test_corrupted_payload_is_refused(payload_path, install_dir):
+    with open(payload_path, 'r+b') as f: # The first member starts the payload
+        f.seek(1024)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    success, events = install(payload_path, install_dir)
+    assert not success
+    assert any(("Payload is corrupted" in value[1]) for name, value in events if (name=="error"))
+    assert not os.path.exists(os.path.join(install_dir, "app.bin")) # Verified before anything is written
+    assert not os.path.exists(os.path.join(install_dir, MANIFEST_FILENAME))
+
+def test_corrupted_install_is_detected(payload_path, install_dir):
+    engine = InstallEngine(payload_path, install_dir, workers=2)
+    finish_member = engine.finish_member
+    def finish_and_corrupt(member):
+        finish_member(member)
+        if (member["path"]=="app.bin"):
+            with open(os.path.join(install_dir, "app.bin"), 'r+b') as f:
+                f.write(b"\0" * 16)
+        return None
+    engine.finish_member = finish_and_corrupt
+    assert not engine.run()
+    assert any(("Installed file is corrupted" in value[1]) for name, value in engine.drain_events() if (name=="error"))
+
+def test_missing_payload(tmp_path, install_dir):
+    success, events = install(str(tmp_path / "missing.pwz"), install_dir)
+    assert not success
+    assert get_event(events, "done")==False
+
+def test_cancelled_install_fails(payload_path, install_dir):
+    engine = InstallEngine(payload_path, install_dir, workers=2)
+    engine.cancel()
+    assert not engine.run()
+    assert any(("cancelled" in value[1]) for name, value in engine.drain_events() if (name=="error"))
+
+def cancel_after_blocks(engine, count):
+    """Cancel the install once count blocks are written"""
+    extract_block, written = engine.extract_block, []
+    def extract_then_cancel(member, idx):
+        extract_block(member, idx)
+        written.append(idx)
+        if (len(written)==count):
+            engine.cancel()
+        return None
+    engine.extract_block = extract_then_cancel
+    return None
+
+def test_cancel_then_resume(monkeypatch, payload_path, install_dir):
+    monkeypatch.setattr(install_engine, "JOURNAL_SYNC_S", 0.0) # Commit as soon as a record is queued
+    reader = open_payload(payload_path)
+    total_blocks = sum(len(member["blocks"]) for member in reader.members)
+    reader.close()
+
+    engine = InstallEngine(payload_path, install_dir, workers=1)
+    cancel_after_blocks(engine, 3)
+    assert not engine.run()
+    assert os.path.exists(os.path.join(install_dir, JOURNAL_FILENAME))
+
+    # The next install resumes and only writes the blocks left
+    engine = InstallEngine(payload_path, install_dir, workers=1)
+    resumable = engine.find_resumable()
+    assert (resumable is not None) and (0.0 < resumable < 1.0)
+    extract_block, written = engine.extract_block, []
+    engine.extract_block = lambda member, idx: written.append(idx) or extract_block(member, idx)
+    assert engine.run()
+    assert 0 < len(written) <= total_blocks - 3
+    assert get_event(engine.drain_events(), "resume")[0] > 0
+    assert_installed(install_dir, FILES)
+    assert InstallEngine(payload_path, install_dir).find_resumable() is None # Journal removed once done
+
+def test_start_over_ignores_the_journal(monkeypatch, payload_path, install_dir):
+    monkeypatch.setattr(install_engine, "JOURNAL_SYNC_S", 0.0)
+    engine = InstallEngine(payload_path, install_dir, workers=1)
+    cancel_after_blocks(engine, 3)
+    assert not engine.run()
+    engine = InstallEngine(payload_path, install_dir, workers=2, resume=False)
+    assert engine.run()
+    assert not any((name=="resume") for name, value in engine.drain_events())
+    assert_installed(install_dir, FILES)
+
+def test_journal_of_another_payload_is_ignored(monkeypatch, tmp_path, payload_path, install_dir):
+    monkeypatch.setattr(install_engine, "JOURNAL_SYNC_S", 0.0)
+    engine = InstallEngine(payload_path, install_dir, workers=1)
+    cancel_after_blocks(engine, 3)
+    assert not engine.run()
+    files = dict(FILES, **{"readme.txt": b"changed\n"})
+    other_path = pack(tmp_path, files, name="payload2.pwz")
+    assert InstallEngine(other_path, install_dir).find_resumable() is None
+    assert install(other_path, install_dir)[0]
+    assert_installed(install_dir, files)
+
+def test_journal_is_committed_while_a_task_runs(monkeypatch, payload_path, install_dir):
+    monkeypatch.setattr(install_engine, "JOURNAL_SYNC_S", 0.05)
+    journal_path = os.path.join(install_dir, JOURNAL_FILENAME)
+    engine = InstallEngine(payload_path, install_dir, workers=1)
+    extract_block, waited = engine.extract_block, []
+    def extract_then_wait(member, idx):
+        extract_block(member, idx)
+        if waited:
+            return None
+        record, deadline = f'["b","{member["path"]}",{idx}]', time.monotonic() + 5.0
+        while (time.monotonic() < deadline): # The only worker records nothing else meanwhile
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                if (record in f.read()):
+                    break
+            time.sleep(0.01)
+        waited.append(time.monotonic() < deadline)
+        return None
+    engine.extract_block = extract_then_wait
+    assert engine.run()
+    assert waited==[True]
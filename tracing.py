@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+
+#NOTE: opt-in startup tracing, enabled with the environment variable 'PYWIZ_TRACE=1' (or 'PYWIZ_TRACE=path/to/trace.json').
+#NOTE: spans are written as a Chrome trace-event json (open it in chrome://tracing or https://ui.perfetto.dev)
+#      and as a text summary next to it. When disabled, span() returns a shared no-op object, nothing is recorded.
+
+TRACE_ENV = 'PYWIZ_TRACE'
+TRACE_OFF = ('', '0', 'false', 'no', 'off') #values disabling the trace, compared lowercase
+TRACE_ON = ('1', 'true', 'yes', 'on') #values tracing to the default path, any other value is the output path
+TRACE_VALUE = os.environ.get(TRACE_ENV, '').strip()
+TRACING = (TRACE_VALUE.lower() not in TRACE_OFF)
+TRACE_PATH = os.path.join(tempfile.gettempdir(), 'pywiz_trace.json') if (TRACE_VALUE.lower() in TRACE_ON) else TRACE_VALUE
+ORIGIN = time.perf_counter() #timestamps are relative to this module import, the first thing main.py does
+
+EVENTS = [] #chrome trace events, list.append is atomic so workers can record too
+THREADS = {} #thread id -> thread name, written as metadata events
+
+def now_us():
+    return (time.perf_counter() - ORIGIN) * 1_000_000
+
+def record(event):
+    thread = threading.current_thread()
+    THREADS[thread.ident] = thread.name
+    event.update({"pid": os.getpid(), "tid": thread.ident})
+    EVENTS.append(event)
+    return None
+
+class Span:
+    """Record the time between enter and exit (or start and end) as a complete event"""
+
+    __slots__ = ("name", "args", "start_us")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start_us = None
+
+    def start(self):
+        self.start_us = now_us()
+        return self
+
+    def end(self):
+        record({"name": self.name, "ph": "X", "ts": self.start_us, "dur": now_us() - self.start_us, "args": self.args})
+        return None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end()
+        return False
+
+class NullSpan:
+    """Shared do-nothing span returned when tracing is disabled"""
+
+    __slots__ = ()
+
+    def start(self):
+        return self
+
+    def end(self):
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = NullSpan()
+
+def span(name, **args):
+    """Context manager timing a block, 'with span("load header", page=1):'"""
+    if (not TRACING):
+        return NULL_SPAN
+    return Span(name, args)
+
+def start_span(name, **args):
+    """Span ending later with .end(), for durations crossing callbacks"""
+    if (not TRACING):
+        return NULL_SPAN
+    return Span(name, args).start()
+
+def instant(name, **args):
+    """Record a point in time"""
+    if TRACING:
+        record({"name": name, "ph": "i", "s": "g", "ts": now_us(), "args": args})
+    return None
+
+def write_summary(path, events):
+    """Write the spans as text, in start order, with their duration"""
+    spans = sorted((e for e in events if (e["ph"] in ("X", "i"))), key=lambda e: e["ts"])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"{'start ms':>10}  {'duration ms':>11}  {'thread':<20}  name\n")
+        for e in spans:
+            duration = f"{e['dur'] / 1000:11.1f}" if (e["ph"]=="X") else f"{'':>11}"
+            args = " ".join(f"{k}={v}" for k, v in e["args"].items())
+            f.write(f"{e['ts'] / 1000:10.1f}  {duration}  {THREADS.get(e['tid'], '?')[:20]:<20}  {e['name']} {args}\n")
+    return None
+
+def write_trace():
+    """Write the chrome trace json and its text summary, can be called several times, each call writes everything so far"""
+    if (not TRACING):
+        return None
+    events = list(EVENTS)
+    metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}} for tid, name in THREADS.items()]
+    try:
+        with open(TRACE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        write_summary(os.path.splitext(TRACE_PATH)[0] + '.txt', events)
+        print(f"[TRACE]: Startup trace written to '{TRACE_PATH}'")
+    except OSError as e:
+        print(f"[ERROR]: write_trace(): Could not write trace '{TRACE_PATH}': {e}")
+    return None
+
+if TRACING:
+    atexit.register(write_trace) # Spans recorded after startup (page changes, install) are kept too